@@ -5,12 +5,13 @@ TaskFlowr Multi-Agent System
 __version__ = "1.0.0"
 __author__ = "TaskFlowr Team"
 
-from .coordinator import create_coordinator
+from .coordinator import create_coordinator, get_coordinator
 from .automation_agent import create_automation_agent
 from .communication_agent import create_communication_agent
 
 __all__ = [
     'create_coordinator',
+    'get_coordinator',
     'create_automation_agent', 
     'create_communication_agent'
 ]
\ No newline at end of file
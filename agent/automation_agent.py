@@ -5,99 +5,142 @@ With mock data support
 """
 
 import os
-import json
+import re
+import asyncio
 import random
-from datetime import datetime
+from types import MappingProxyType
 
-try:
-    from google import genai
-    from google.genai import types
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+from .batch_dispatcher import BatchDispatcher, join_prompts, split_response
+from .llm_cache import ResultCache, is_command_task, make_key
+from .utils import from_json, get_genai_client, load_genai, module_available, read_prompt, to_json, today
+
+# google.genai is only imported once a live client is created
+GEMINI_AVAILABLE = module_available("google.genai")
+
+
+# Line classification for the single-pass response scanner. Lines are
+# dispatched on their first character; keywords are matched on the lowered line
+_CHECKLIST_MARKS = (' [ ]', ' [x]')
+_WORKFLOW_KEYWORD_RE = re.compile(r'st(?:ep|age)|phase|first|next|then')
+
+# Keyword rules selecting the mock template, checked in order against the lowercased task
+_MOCK_TEMPLATE_RULES = (
+    (re.compile(r'sales|report|revenue'), "sales_report"),
+    (re.compile(r'checklist|onboarding|process'), "checklist"),
+    (re.compile(r'metrics|analysis|kpi'), "metrics"),
+    (re.compile(r'onboarding|welcome|new'), "onboarding"),
+)
+
+
+def _load_automation_prompt():
+    """Load automation agent system prompt"""
+    try:
+        return read_prompt("automation_prompt.txt")
+    except OSError:
+        return """You are the Automation Agent for TaskFlowr. You handle structured, operational, and data-driven tasks.
+
+Your capabilities:
+- Generate checklists and SOPs
+- Create data templates and structures
+- Design workflows and processes
+- Produce structured reports
+
+Rules:
+- Output must be structured, concise, and actionable
+- Use clear formatting with bullet points and sections
+- Focus on practical, implementable outputs"""
+
+
+# Read once at import; every agent instance shares the string
+_AUTOMATION_PROMPT = _load_automation_prompt()
+
+# Fixed instructions sent after the system prompt; kept byte-identical across
+# calls so the provider can reuse its cached prefix
+_AUTOMATION_INSTRUCTIONS = """Generate structured, actionable outputs for each task. Focus on:
+- Checklists and step-by-step procedures
+- Data templates if needed
+- Workflow descriptions
+- Structured recommendations
+
+Format your response clearly with sections and bullet points."""
+
+
+def _build_system_instruction(system_prompt: str) -> str:
+    """Static prompt prefix shared by every automation request"""
+    return f"{system_prompt}\n\n{_AUTOMATION_INSTRUCTIONS}"
 
 
 class AutomationAgent:
     """Handles structured, data-driven automation tasks"""
     
-    def __init__(self, api_key=None, use_mock=False):
+    __slots__ = ('use_mock', 'client', '_dispatcher', '_result_cache', 'system_prompt',
+                 '_system_instruction', '_rng')
+    
+    def __init__(self, api_key=None, use_mock=False, client=None):
         self.use_mock = use_mock or not GEMINI_AVAILABLE
         
         if not self.use_mock and GEMINI_AVAILABLE:
             try:
-                self.client = genai.Client(api_key=api_key or os.getenv('GOOGLE_API_KEY'))
+                # Agents share one client (and connection pool) per API key
+                self.client = client or get_genai_client(api_key or os.getenv('GOOGLE_API_KEY'))
             except:
                 self.use_mock = True
         else:
             self.use_mock = True
         
-        self.system_prompt = self._load_automation_prompt()
+        # Concurrent live requests are coalesced into one Gemini call
+        self._dispatcher = BatchDispatcher(self._generate_batch)
         
-        # Mock data templates
-        self.mock_templates = {
-            "sales_report": self._mock_sales_report,
-            "checklist": self._mock_checklist,
-            "metrics": self._mock_metrics,
-            "onboarding": self._mock_onboarding,
-            "default": self._mock_default
-        }
+        # Recent results for repeated informational tasks
+        self._result_cache = ResultCache(maxsize=256)
+        
+        self.system_prompt = _AUTOMATION_PROMPT
+        self._system_instruction = _build_system_instruction(self.system_prompt)
+        
+        # Per-agent RNG for mock data; seed it for reproducible output
+        self._rng = random.Random()
     
-    def _load_automation_prompt(self):
-        """Load automation agent system prompt"""
-        try:
-            prompt_path = os.path.join(os.path.dirname(__file__), "prompts", "automation_prompt.txt")
-            with open(prompt_path, "r", encoding='utf-8') as f:
-                return f.read()
-        except:
-            return """You are the Automation Agent for TaskFlowr. You handle structured, operational, and data-driven tasks.
-
-Your capabilities:
-- Generate checklists and SOPs
-- Create data templates and structures
-- Design workflows and processes
-- Produce structured reports
-
-Rules:
-- Output must be structured, concise, and actionable
-- Use clear formatting with bullet points and sections
-- Focus on practical, implementable outputs"""
+    async def reload_prompt(self):
+        """Re-read the system prompt from disk without blocking the event loop"""
+        self.system_prompt = await asyncio.to_thread(_load_automation_prompt)
+        self._system_instruction = _build_system_instruction(self.system_prompt)
     
     async def process_automation_task(self, task_description: str, context: dict) -> dict:
         """Process automation-focused tasks"""
         print(f"⚙️ Automation Agent processing: {task_description}")
         
-        if self.use_mock:
-            return await self._process_mock_automation(task_description, context)
+        # The automation output depends only on the task text
+        cache_key = None if is_command_task(task_description) else make_key("automation", task_description)
+        if cache_key is not None:
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                # Frozen as JSON so no caller shares nested lists with the cache
+                return from_json(cached)
         
-        prompt = f"""
-        SYSTEM: {self.system_prompt}
+        result = await self._run_automation_task(task_description, context)
         
-        TASK: {task_description}
-        
-        Generate structured, actionable outputs for this task. Focus on:
-        - Checklists and step-by-step procedures
-        - Data templates if needed
-        - Workflow descriptions
-        - Structured recommendations
+        # Don't let a mock fallback stand in for a live answer
+        if cache_key is not None and (self.use_mock or not result.get("mock_data")):
+            self._result_cache.put(cache_key, to_json(result))
+        return result
+    
+    async def _run_automation_task(self, task_description: str, context: dict) -> dict:
+        """Generate automation outputs with Gemini or mock data"""
+        if self.use_mock:
+            return await self._process_mock_automation(task_description, context)
         
-        Format your response clearly with sections and bullet points.
-        """
+        # Only the task varies; the fixed prefix goes out as the system instruction
+        prompt = f"TASK: {task_description}"
         
         try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.1
-                )
-            )
+            response_text = await self._dispatcher.submit(prompt)
             
-            structured_outputs = self._parse_automation_outputs(response.text)
+            structured_outputs = self._parse_automation_outputs(response_text)
             
             return {
                 "task": task_description,
                 "structured_outputs": structured_outputs,
-                "raw_response": response.text,
+                "raw_response": response_text,
                 "status": "completed"
             }
             
@@ -105,24 +148,29 @@ Rules:
             print(f"Automation API error: {e}, using mock data")
             return await self._process_mock_automation(task_description, context)
     
+    async def _generate_batch(self, prompts: list) -> list:
+        """Send one or more prompts to Gemini in a single request"""
+        response = await self.client.aio.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=join_prompts(prompts),
+            config=load_genai().types.GenerateContentConfig(
+                system_instruction=self._system_instruction,
+                temperature=0.1
+            )
+        )
+        return split_response(response.text, len(prompts))
+    
     async def _process_mock_automation(self, task_description: str, context: dict) -> dict:
         """Process automation task with mock data"""
         # Determine which mock template to use
         task_lower = task_description.lower()
-        
-        if any(word in task_lower for word in ['sales', 'report', 'revenue']):
-            template_type = "sales_report"
-        elif any(word in task_lower for word in ['checklist', 'onboarding', 'process']):
-            template_type = "checklist"
-        elif any(word in task_lower for word in ['metrics', 'analysis', 'kpi']):
-            template_type = "metrics"
-        elif any(word in task_lower for word in ['onboarding', 'welcome', 'new']):
-            template_type = "onboarding"
-        else:
-            template_type = "default"
+        template_type = next(
+            (name for pattern, name in _MOCK_TEMPLATE_RULES if pattern.search(task_lower)),
+            "default"
+        )
         
         # Generate mock data
-        mock_output = self.mock_templates[template_type](task_description)
+        mock_output = self.mock_templates[template_type](self, task_description)
         structured_outputs = self._parse_automation_outputs(mock_output)
         
         return {
@@ -133,25 +181,23 @@ Rules:
             "mock_data": True
         }
     
-    def _mock_sales_report(self, task: str) -> str:
-        """Generate mock sales report"""
-        return f"""
+    _SALES_REPORT_TEMPLATE = """
 # Sales Report Automation
 **Generated for:** {task}
-**Date:** {datetime.now().strftime("%Y-%m-%d")}
+**Date:** {date}
 
 ## Quarterly Sales Data
-- **Q4 Revenue:** ${random.randint(500000, 1000000):,}
-- **Growth vs Q3:** +{random.randint(5, 25)}%
+- **Q4 Revenue:** ${revenue:,}
+- **Growth vs Q3:** +{growth}%
 - **Top Performing Products:**
-  1. Product X: ${random.randint(150000, 300000):,}
-  2. Product Y: ${random.randint(120000, 250000):,}
-  3. Product Z: ${random.randint(100000, 200000):,}
+  1. Product X: ${product_x:,}
+  2. Product Y: ${product_y:,}
+  3. Product Z: ${product_z:,}
 
 ## Regional Performance
-- **North America:** ${random.randint(200000, 400000):,} (+{random.randint(8, 20)}%)
-- **Europe:** ${random.randint(180000, 350000):,} (+{random.randint(5, 15)}%)
-- **Asia Pacific:** ${random.randint(120000, 250000):,} (+{random.randint(12, 30)}%)
+- **North America:** ${north_america:,} (+{north_america_growth}%)
+- **Europe:** ${europe:,} (+{europe_growth}%)
+- **Asia Pacific:** ${asia_pacific:,} (+{asia_pacific_growth}%)
 
 ## Key Metrics Checklist
 - [ ] Monthly revenue tracking
@@ -166,9 +212,25 @@ Rules:
 3. Review sales incentives for underperforming regions
 """
     
-    def _mock_checklist(self, task: str) -> str:
-        """Generate mock checklist"""
-        return f"""
+    def _mock_sales_report(self, task: str) -> str:
+        """Generate mock sales report"""
+        return self._SALES_REPORT_TEMPLATE.format_map({
+            "task": task,
+            "date": today(),
+            "revenue": self._rng.randint(500000, 1000000),
+            "growth": self._rng.randint(5, 25),
+            "product_x": self._rng.randint(150000, 300000),
+            "product_y": self._rng.randint(120000, 250000),
+            "product_z": self._rng.randint(100000, 200000),
+            "north_america": self._rng.randint(200000, 400000),
+            "north_america_growth": self._rng.randint(8, 20),
+            "europe": self._rng.randint(180000, 350000),
+            "europe_growth": self._rng.randint(5, 15),
+            "asia_pacific": self._rng.randint(120000, 250000),
+            "asia_pacific_growth": self._rng.randint(12, 30)
+        })
+    
+    _CHECKLIST_TEMPLATE = """
 # Automated Checklist Generation
 **Task:** {task}
 
@@ -202,20 +264,22 @@ Rules:
 *Checklist generated automatically by TaskFlowr Automation Agent*
 """
     
-    def _mock_metrics(self, task: str) -> str:
-        """Generate mock metrics analysis"""
-        return f"""
+    def _mock_checklist(self, task: str) -> str:
+        """Generate mock checklist"""
+        return self._CHECKLIST_TEMPLATE.format_map({"task": task})
+    
+    _METRICS_TEMPLATE = """
 # Metrics Analysis Report
 **Analysis Target:** {task}
 
 ## Key Performance Indicators
-- **Monthly Active Users:** {random.randint(10000, 50000)}
-- **Conversion Rate:** {random.uniform(2.5, 8.5):.1f}%
-- **Customer Satisfaction:** {random.randint(80, 95)}/100
-- **Revenue Growth:** +{random.randint(8, 22)}% MoM
+- **Monthly Active Users:** {active_users}
+- **Conversion Rate:** {conversion_rate:.1f}%
+- **Customer Satisfaction:** {satisfaction}/100
+- **Revenue Growth:** +{revenue_growth}% MoM
 
 ## Trend Analysis
-- User engagement increased by {random.randint(5, 15)}% this month
+- User engagement increased by {engagement_growth}% this month
 - Conversion rates stable within target range
 - Customer satisfaction shows positive trend
 - Revenue growth exceeding projections
@@ -227,9 +291,18 @@ Rules:
 4. Monitor satisfaction drivers closely
 """
     
-    def _mock_onboarding(self, task: str) -> str:
-        """Generate mock onboarding workflow"""
-        return f"""
+    def _mock_metrics(self, task: str) -> str:
+        """Generate mock metrics analysis"""
+        return self._METRICS_TEMPLATE.format_map({
+            "task": task,
+            "active_users": self._rng.randint(10000, 50000),
+            "conversion_rate": self._rng.uniform(2.5, 8.5),
+            "satisfaction": self._rng.randint(80, 95),
+            "revenue_growth": self._rng.randint(8, 22),
+            "engagement_growth": self._rng.randint(5, 15)
+        })
+    
+    _ONBOARDING_TEMPLATE = """
 # Onboarding Workflow Automation
 **For:** {task}
 
@@ -263,9 +336,11 @@ Rules:
 - Full team integration within 90 days
 """
     
-    def _mock_default(self, task: str) -> str:
-        """Default mock response"""
-        return f"""
+    def _mock_onboarding(self, task: str) -> str:
+        """Generate mock onboarding workflow"""
+        return self._ONBOARDING_TEMPLATE.format_map({"task": task})
+    
+    _DEFAULT_TEMPLATE = """
 # Automated Task Processing
 **Task:** {task}
 
@@ -290,62 +365,101 @@ Review the generated outputs and customize for your specific implementation cont
 *Processed by TaskFlowr Automation Agent*
 """
     
+    def _mock_default(self, task: str) -> str:
+        """Default mock response"""
+        return self._DEFAULT_TEMPLATE.format_map({"task": task})
+    
+    # Mock data templates, shared by all instances
+    mock_templates = MappingProxyType({
+        "sales_report": _mock_sales_report,
+        "checklist": _mock_checklist,
+        "metrics": _mock_metrics,
+        "onboarding": _mock_onboarding,
+        "default": _mock_default
+    })
+    
     def _parse_automation_outputs(self, response_text: str) -> dict:
         """Parse structured outputs from agent response"""
-        outputs = {
-            "checklists": self._extract_checklists(response_text),
-            "templates": self._extract_templates(response_text),
-            "workflows": self._extract_workflows(response_text),
-            "sections": self._extract_sections(response_text)
-        }
-        return outputs
+        return self._scan_response(response_text)
     
-    def _extract_checklists(self, text: str) -> list:
-        """Extract checklist items from text"""
+    def _scan_response(self, text: str) -> dict:
+        """Walk the response once, collecting checklists, templates, workflows and sections"""
         checklists = []
-        lines = text.split('\n')
+        sections = []
+        steps = []
+        json_lines = []
         current_checklist = None
+        current_section = None
+        templates_seen = False
+        fence_end = None
         
-        for line in lines:
+        lines = text.split('\n')
+        for index, line in enumerate(lines):
             line = line.strip()
-            if line.startswith(('- [ ]', '- [x]', '• [ ]', '• [x]')):
+            if not line:
+                continue
+            
+            # Fenced ```json blocks are collected verbatim, not classified; a
+            # fence that never closes is ignored so the lines after it still count
+            if fence_end is not None:
+                if index == fence_end:
+                    fence_end = None
+                else:
+                    json_lines.append(line)
+                continue
+            if line.startswith('```json'):
+                fence_end = next(
+                    (end for end in range(index + 1, len(lines)) if lines[end].lstrip().startswith('```')),
+                    None
+                )
+                if fence_end is not None:
+                    continue
+            
+            line_lower = line.lower()
+            if not templates_seen and ('template' in line_lower or 'format' in line_lower or 'structure' in line_lower):
+                templates_seen = True
+            if len(line) > 10 and _WORKFLOW_KEYWORD_RE.search(line_lower):
+                steps.append(line)
+            
+            first = line[0]
+            if first == '#':
+                kind = 'section' if line.startswith('## ') else 'header'
+            elif (first == '-' or first == '•') and line[1:5] in _CHECKLIST_MARKS:
+                kind = 'item'
+            else:
+                kind = None
+            
+            if kind == 'item':
                 if current_checklist:
                     current_checklist['items'].append(line)
                 else:
                     current_checklist = {'title': 'Checklist', 'items': [line]}
-            elif line and len(line) < 100 and line.startswith('#'):
+            elif kind and len(line) < 100:
                 if current_checklist and current_checklist['items']:
                     checklists.append(current_checklist)
                 current_checklist = {'title': line.replace('#', '').strip(), 'items': []}
+            
+            if kind == 'section' and len(line) < 100:
+                if current_section:
+                    sections.append(current_section)
+                current_section = {'title': line.replace('##', '').strip(), 'content': []}
+            elif current_section is not None and kind not in ('section', 'header') and len(line) > 10:
+                current_section['content'].append(line)
         
         if current_checklist and current_checklist['items']:
             checklists.append(current_checklist)
+        if current_section:
+            sections.append(current_section)
         
-        return checklists if checklists else [{'title': 'General Checklist', 'items': ['Task processed successfully']}]
-    
-    def _extract_templates(self, text: str) -> list:
-        """Extract template structures from text"""
         templates = []
-        if any(word in text.lower() for word in ['template', 'format', 'structure']):
+        if templates_seen or json_lines:
             templates.append({
                 "type": "data_template",
                 "description": "Structured data format",
-                "fields": ["field1", "field2", "field3"]
+                "fields": self._template_fields(json_lines)
             })
-        return templates
-    
-    def _extract_workflows(self, text: str) -> list:
-        """Extract workflow steps from text"""
-        workflows = []
-        lines = text.split('\n')
-        steps = []
-        
-        for line in lines:
-            line_lower = line.lower()
-            if any(keyword in line_lower for keyword in ['step', 'phase', 'stage', 'first', 'next', 'then']):
-                if len(line.strip()) > 10:
-                    steps.append(line.strip())
         
+        workflows = []
         if steps:
             workflows.append({
                 "name": "Automated Workflow",
@@ -353,28 +467,23 @@ Review the generated outputs and customize for your specific implementation cont
                 "step_count": len(steps)
             })
         
-        return workflows
+        return {
+            "checklists": checklists if checklists else [{'title': 'General Checklist', 'items': ['Task processed successfully']}],
+            "templates": templates,
+            "workflows": workflows,
+            "sections": sections if sections else [{'title': 'Output', 'content': [text[:200] + '...']}]
+        }
     
-    def _extract_sections(self, text: str) -> list:
-        """Extract sections from structured response"""
-        sections = []
-        lines = text.split('\n')
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('## ') and len(line) < 100:
-                if current_section:
-                    sections.append(current_section)
-                current_section = {'title': line.replace('##', '').strip(), 'content': []}
-            elif current_section is not None and line and not line.startswith('#') and len(line) > 10:
-                current_section['content'].append(line)
-        
-        if current_section:
-            sections.append(current_section)
-        
-        return sections if sections else [{'title': 'Output', 'content': [text[:200] + '...']}]
-
+    def _template_fields(self, json_lines: list) -> list:
+        """Use the keys of a fenced JSON object as template fields when available"""
+        if json_lines:
+            try:
+                data = from_json('\n'.join(json_lines))
+                if isinstance(data, dict) and data:
+                    return list(data.keys())
+            except ValueError:
+                pass
+        return ["field1", "field2", "field3"]
 
 def create_automation_agent(api_key=None, use_mock=False) -> AutomationAgent:
     """Factory function for automation agent"""
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Batch Dispatcher - Coalesces concurrent model requests into a single Gemini call
+"""
+
+import re
+import asyncio
+
+# Marker line the model is asked to emit before each answer in a batched reply
+_RESPONSE_MARKER = "=====RESPONSE {index}====="
+_RESPONSE_MARKER_RE = re.compile(r'^=====RESPONSE (\d+)=====[ \t]*$', re.MULTILINE)
+
+
+def join_prompts(prompts: list) -> str:
+    """Marshal several prompts into one request body"""
+    if len(prompts) == 1:
+        return prompts[0]
+
+    parts = [
+        f"You will receive {len(prompts)} independent requests. Answer each one separately.",
+        "Begin every answer with its marker line exactly as shown, e.g. "
+        f"{_RESPONSE_MARKER.format(index=1)}, and do not add any other marker lines.",
+        ""
+    ]
+    for index, prompt in enumerate(prompts, 1):
+        parts.append(f"--- REQUEST {index} ---")
+        parts.append(prompt.strip())
+        parts.append("")
+    return '\n'.join(parts)
+
+
+def split_response(text: str, count: int) -> list:
+    """Split a batched reply back into one response per prompt"""
+    if count == 1:
+        return [text]
+
+    matches = list(_RESPONSE_MARKER_RE.finditer(text))
+    indices = [int(m.group(1)) for m in matches]
+    if indices != list(range(1, count + 1)):
+        raise ValueError(f"Batched response had markers {indices}, expected 1..{count}")
+
+    bounds = [m.end() for m in matches]
+    ends = [m.start() for m in matches[1:]] + [len(text)]
+    return [text[start:end].strip() for start, end in zip(bounds, ends)]
+
+
+class BatchDispatcher:
+    """Collects prompts submitted concurrently and resolves them from one batched call"""
+
+    def __init__(self, send_batch, max_batch=32, max_wait_ms=10):
+        # send_batch: async callable taking a list of prompts, returning a list of texts
+        self._send_batch = send_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._worker = None
+        # Batches in flight; kept so their tasks are not garbage collected
+        self._dispatches = set()
+
+    async def submit(self, prompt: str) -> str:
+        """Queue a prompt and wait for its response text"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, future))
+        return await future
+
+    def _ensure_worker(self):
+        """Start the batching loop on the running event loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._batch_loop())
+
+    async def _batch_loop(self):
+        """Drain the queue in windows of up to max_batch prompts / max_wait seconds"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep draining while this batch waits on Gemini
+            task = loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: list):
+        """Send one batch, falling back to individual requests if it cannot be split"""
+        try:
+            texts = await self._send_batch([prompt for prompt, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                await asyncio.gather(*(self._dispatch([item]) for item in batch))
+                return
+            texts = None
+            error = e
+
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if texts is None:
+                future.set_exception(error)
+            else:
+                future.set_result(texts[index])
@@ -5,70 +5,173 @@ With mock data support
 """
 
 import os
-import json
+import re
+import asyncio
 import random
-from datetime import datetime
+from types import MappingProxyType
+
+from .batch_dispatcher import BatchDispatcher, join_prompts, split_response
+from .llm_cache import LLMCache, ResultCache, is_command_task, make_key
+from .utils import from_json, get_genai_client, load_genai, module_available, preview, read_prompt, to_json, today
+
+# google.genai is only imported once a live client is created
+GEMINI_AVAILABLE = module_available("google.genai")
+
+
+# Keyword rules selecting the mock template, checked in order against the lowercased task
+_MOCK_TEMPLATE_RULES = (
+    (re.compile(r'email|draft|send'), "email"),
+    (re.compile(r'summary|briefing|executive'), "summary"),
+    (re.compile(r'announcement|update|news'), "announcement"),
+)
+
+# Tone inference rules over lowercased context fields, checked in order
+_TONE_RULES = (
+    ("task_type", re.compile(r'executive|leadership|ceo|board'), "executive"),
+    ("audience", re.compile(r'team|colleagues|internal|staff'), "friendly"),
+    ("task_type", re.compile(r'technical|engineering|development|code'), "technical"),
+)
+
+# Mock email subjects, picked by the first rule whose keywords appear in the task
+_MOCK_SUBJECT_RULES = (
+    (('sales',), "Q4 Sales Performance Update and Key Insights"),
+    (('onboarding', 'welcome'), "Welcome to the Team - Onboarding Information"),
+    (('metrics', 'analysis'), "Monthly Performance Metrics Review"),
+)
+_MOCK_DEFAULT_SUBJECT = "Important Update Regarding Your Request"
+
+# Mock greetings and sign-offs by tone
+_MOCK_GREETINGS = MappingProxyType({
+    "professional": "Dear Team,",
+    "friendly": "Hello everyone!",
+    "executive": "To the Leadership Team:",
+    "technical": "Team,"
+})
+_MOCK_CLOSINGS = MappingProxyType({
+    "professional": "Best regards,\n[Your Name]",
+    "friendly": "Looking forward to our continued collaboration!\nBest,",
+    "executive": "Sincerely,\n[Executive Name]",
+    "technical": "Regards,\n[Your Name]"
+})
+
+# Email line prefixes, matched against the lowercased line
+_GREETINGS = ('dear', 'hello', 'to the')
+_BODY_OPENERS = ('dear', 'hello')
+_CLOSINGS = ('best', 'regards', 'sincerely', 'thank you')
+
+# Bullet, numbered ("1.") or starred lines, captured without surrounding whitespace
+_BULLET_RE = re.compile(r'^[^\S\n]*([-•*](?:[^\n]*\S)?|\d\.[^\n]*\S)', re.MULTILINE)
+
+# Tone and style preferences, read-only and shared by all instances
+_STYLE_GUIDE = MappingProxyType({
+    "professional": "Clear, concise, business-appropriate language",
+    "friendly": "Warm, approachable, collaborative tone",
+    "executive": "High-level, strategic, decision-focused",
+    "technical": "Precise, detailed, domain-specific"
+})
+
+# A '.'-delimited sentence of over 20 characters, without surrounding whitespace
+_KEY_MESSAGE_RE = re.compile(r'[^.\s][^.]{19,}[^.\s]')
+
+# Content-type flags raised by keywords in a response
+_EMAIL, _SUMMARY, _ANNOUNCEMENT = 1, 2, 4
+_ALL_CONTENT_FLAGS = _EMAIL | _SUMMARY | _ANNOUNCEMENT
+_KW_BITS = {
+    'dear': _EMAIL, 'subject:': _EMAIL, 'regards': _EMAIL, 'sincerely': _EMAIL,
+    'summary': _SUMMARY, 'key takeaways': _SUMMARY, 'executive': _SUMMARY,
+    'announce': _ANNOUNCEMENT, 'update': _ANNOUNCEMENT, 'team': _ANNOUNCEMENT, 'news': _ANNOUNCEMENT
+}
+# Lookahead so overlapping keywords are all reported
+_KW_RE = re.compile('(?=(' + '|'.join(re.escape(kw) for kw in _KW_BITS) + '))')
+
+
+def _classify_content(lower: str) -> int:
+    """Scan casefolded text once and return the content-type flags it raises"""
+    flags = 0
+    for match in _KW_RE.finditer(lower):
+        flags |= _KW_BITS[match.group(1)]
+        if flags == _ALL_CONTENT_FLAGS:
+            break
+    return flags
+
+
+def _load_communication_prompt():
+    """Load communication agent system prompt"""
+    try:
+        return read_prompt("communication_prompt.txt")
+    except OSError:
+        return """You are the Communication Agent for TaskFlowr. You handle all human-facing content and business communication.
 
-try:
-    from google import genai
-    from google.genai import types
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+Your responsibilities:
+- Draft professional emails and announcements
+- Create executive summaries and briefings
+- Prepare team communications
+- Adapt tone for different audiences
+
+Rules:
+- Always maintain professional standards
+- Be clear, concise, and actionable
+- Adapt tone based on audience and context"""
+
+
+# Read once at import; every agent instance shares the string
+_COMMUNICATION_PROMPT = _load_communication_prompt()
+
+# Fixed instructions sent after the system prompt and style guide; kept
+# byte-identical across calls so the provider can reuse its cached prefix
+_COMMUNICATION_INSTRUCTIONS = """Create professional, well-structured communication content.
+Focus on clarity, appropriate tone, and actionable information.
+Write in the style listed for the requested TONE."""
+
+
+def _build_system_instruction(system_prompt: str) -> str:
+    """Static prompt prefix shared by every communication request"""
+    style_guide = to_json(dict(_STYLE_GUIDE), indent=True)
+    return f"{system_prompt}\n\nSTYLE GUIDE:\n{style_guide}\n\n{_COMMUNICATION_INSTRUCTIONS}"
 
 
 class CommunicationAgent:
     """Handles communication, summarization, and human-facing content"""
     
-    def __init__(self, api_key=None, use_mock=False):
+    __slots__ = ('use_mock', 'client', '_dispatcher', '_result_cache', '_llm_cache',
+                 'system_prompt', '_system_instruction', 'default_tone', 'style_guide', '_rng')
+    
+    def __init__(self, api_key=None, use_mock=False, client=None):
         self.use_mock = use_mock or not GEMINI_AVAILABLE
         
         if not self.use_mock and GEMINI_AVAILABLE:
             try:
-                self.client = genai.Client(api_key=api_key or os.getenv('GOOGLE_API_KEY'))
+                # Agents share one client (and connection pool) per API key
+                self.client = client or get_genai_client(api_key or os.getenv('GOOGLE_API_KEY'))
             except:
                 self.use_mock = True
         else:
             self.use_mock = True
         
-        self.system_prompt = self._load_communication_prompt()
+        # Concurrent live requests are coalesced into one Gemini call
+        self._dispatcher = BatchDispatcher(self._generate_batch)
+        
+        # Recent results for repeated informational tasks, frozen as JSON so
+        # every hit is a fresh copy no caller can share with the cache
+        self._result_cache = ResultCache(maxsize=256)
+        
+        # Model responses by prompt, and by similar task for the same tone
+        self._llm_cache = LLMCache()
+        
+        self.system_prompt = _COMMUNICATION_PROMPT
+        self._system_instruction = _build_system_instruction(self.system_prompt)
         
         # Tone and style preferences
         self.default_tone = "professional"
-        self.style_guide = {
-            "professional": "Clear, concise, business-appropriate language",
-            "friendly": "Warm, approachable, collaborative tone",
-            "executive": "High-level, strategic, decision-focused",
-            "technical": "Precise, detailed, domain-specific"
-        }
+        self.style_guide = _STYLE_GUIDE
         
-        # Mock templates
-        self.mock_templates = {
-            "email": self._mock_email,
-            "summary": self._mock_summary,
-            "announcement": self._mock_announcement,
-            "default": self._mock_default
-        }
+        # Per-agent RNG for mock data; seed it for reproducible output
+        self._rng = random.Random()
     
-    def _load_communication_prompt(self):
-        """Load communication agent system prompt"""
-        try:
-            prompt_path = os.path.join(os.path.dirname(__file__), "prompts", "communication_prompt.txt")
-            with open(prompt_path, "r", encoding='utf-8') as f:
-                return f.read()
-        except:
-            return """You are the Communication Agent for TaskFlowr. You handle all human-facing content and business communication.
-
-Your responsibilities:
-- Draft professional emails and announcements
-- Create executive summaries and briefings
-- Prepare team communications
-- Adapt tone for different audiences
-
-Rules:
-- Always maintain professional standards
-- Be clear, concise, and actionable
-- Adapt tone based on audience and context"""
+    async def reload_prompt(self):
+        """Re-read the system prompt from disk without blocking the event loop"""
+        self.system_prompt = await asyncio.to_thread(_load_communication_prompt)
+        self._system_instruction = _build_system_instruction(self.system_prompt)
     
     async def process_communication_task(self, task_description: str, context: dict) -> dict:
         """Process communication-focused tasks"""
@@ -76,38 +179,49 @@ Rules:
         
         # Determine appropriate tone from context
         tone = self._determine_tone(context)
+        return await self._process_task(task_description, context, tone)
+    
+    async def _process_task(self, task_description: str, context: dict, tone: str) -> dict:
+        """Serve a task from the result cache or generate it"""
+        # Tone is the only part of the context that shapes the output
+        cache_key = None if is_command_task(task_description) else make_key("communication", task_description, tone)
+        if cache_key is not None:
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                return from_json(cached)
+        
+        result = await self._run_communication_task(task_description, context, tone)
         
+        # Don't let a mock fallback stand in for a live answer
+        if cache_key is not None and (self.use_mock or not result.get("mock_data")):
+            self._result_cache.put(cache_key, to_json(result))
+        return result
+    
+    async def _run_communication_task(self, task_description: str, context: dict, tone: str) -> dict:
+        """Generate communication outputs with Gemini or mock data"""
         if self.use_mock:
             return await self._process_mock_communication(task_description, context, tone)
         
-        prompt = f"""
-        SYSTEM: {self.system_prompt}
-        
-        TONE: {tone}
-        STYLE: {self.style_guide.get(tone, 'professional')}
-        
-        TASK: {task_description}
-        
-        Create professional, well-structured communication content.
-        Focus on clarity, appropriate tone, and actionable information.
-        """
+        # Only tone and task vary; the fixed prefix goes out as the system instruction
+        prompt = f"TONE: {tone}\nTASK: {task_description}"
         
+        cacheable = not is_command_task(task_description)
         try:
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    temperature=0.3
-                )
-            )
+            if cacheable:
+                await self._llm_cache.embed_queries([task_description])
+            response_text = self._llm_cache.get(prompt, query=task_description, scope=tone) if cacheable else None
+            if response_text is None:
+                response_text = await self._dispatcher.submit(prompt)
+                if cacheable:
+                    self._llm_cache.put(prompt, response_text, query=task_description, scope=tone)
             
-            communication_outputs = self._parse_communication_outputs(response.text, tone)
+            communication_outputs = self._parse_communication_outputs(response_text, tone)
             
             return {
                 "task": task_description,
                 "tone_used": tone,
                 "communication_outputs": communication_outputs,
-                "raw_response": response.text,
+                "raw_response": response_text,
                 "status": "completed"
             }
             
@@ -115,20 +229,27 @@ Rules:
             print(f"Communication API error: {e}, using mock data")
             return await self._process_mock_communication(task_description, context, tone)
     
+    async def _generate_batch(self, prompts: list) -> list:
+        """Send one or more prompts to Gemini in a single request"""
+        response = await self.client.aio.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=join_prompts(prompts),
+            config=load_genai().types.GenerateContentConfig(
+                system_instruction=self._system_instruction,
+                temperature=0.3
+            )
+        )
+        return split_response(response.text, len(prompts))
+    
     async def _process_mock_communication(self, task_description: str, context: dict, tone: str) -> dict:
         """Process communication task with mock data"""
         task_lower = task_description.lower()
+        template_type = next(
+            (name for pattern, name in _MOCK_TEMPLATE_RULES if pattern.search(task_lower)),
+            "default"
+        )
         
-        if any(word in task_lower for word in ['email', 'draft', 'send']):
-            template_type = "email"
-        elif any(word in task_lower for word in ['summary', 'briefing', 'executive']):
-            template_type = "summary"
-        elif any(word in task_lower for word in ['announcement', 'update', 'news']):
-            template_type = "announcement"
-        else:
-            template_type = "default"
-        
-        mock_output = self.mock_templates[template_type](task_description, tone)
+        mock_output = self.mock_templates[template_type](self, task_description, tone)
         communication_outputs = self._parse_communication_outputs(mock_output, tone)
         
         return {
@@ -140,44 +261,10 @@ Rules:
             "mock_data": True
         }
     
-    def _mock_email(self, task: str, tone: str) -> str:
-        """Generate mock email"""
-        subjects = {
-            "sales": "Q4 Sales Performance Update and Key Insights",
-            "onboarding": "Welcome to the Team - Onboarding Information",
-            "metrics": "Monthly Performance Metrics Review",
-            "general": "Important Update Regarding Your Request"
-        }
-        
-        # Determine email subject based on task
-        task_lower = task.lower()
-        if 'sales' in task_lower:
-            subject = subjects['sales']
-        elif 'onboarding' in task_lower or 'welcome' in task_lower:
-            subject = subjects['onboarding']
-        elif 'metrics' in task_lower or 'analysis' in task_lower:
-            subject = subjects['metrics']
-        else:
-            subject = subjects['general']
-        
-        greetings = {
-            "professional": "Dear Team,",
-            "friendly": "Hello everyone!",
-            "executive": "To the Leadership Team:",
-            "technical": "Team,"
-        }
-        
-        closings = {
-            "professional": "Best regards,\n[Your Name]",
-            "friendly": "Looking forward to our continued collaboration!\nBest,",
-            "executive": "Sincerely,\n[Executive Name]",
-            "technical": "Regards,\n[Your Name]"
-        }
-        
-        return f"""
+    _EMAIL_TEMPLATE = """
 Subject: {subject}
 
-{greetings.get(tone, greetings['professional'])}
+{greeting}
 
 I'm writing to provide an update regarding: {task}
 
@@ -194,24 +281,38 @@ Key accomplishments:
 
 Please review the attached materials and let me know if you have any questions or require additional information.
 
-{closings.get(tone, closings['professional'])}
+{closing}
 
 *This communication was drafted by TaskFlowr Communication Agent*
 """
     
-    def _mock_summary(self, task: str, tone: str) -> str:
-        """Generate mock executive summary"""
-        return f"""
+    def _mock_email(self, task: str, tone: str) -> str:
+        """Generate mock email"""
+        # Determine email subject based on task
+        task_lower = task.lower()
+        subject = next(
+            (subject for keywords, subject in _MOCK_SUBJECT_RULES if any(kw in task_lower for kw in keywords)),
+            _MOCK_DEFAULT_SUBJECT
+        )
+        
+        return self._EMAIL_TEMPLATE.format_map({
+            "subject": subject,
+            "greeting": _MOCK_GREETINGS.get(tone, _MOCK_GREETINGS['professional']),
+            "task": task,
+            "closing": _MOCK_CLOSINGS.get(tone, _MOCK_CLOSINGS['professional'])
+        })
+    
+    _SUMMARY_TEMPLATE = """
 # Executive Summary
 **Prepared for:** {task}
-**Date:** {datetime.now().strftime("%Y-%m-%d")}
-**Tone:** {tone.capitalize()}
+**Date:** {date}
+**Tone:** {tone}
 
 ## Key Takeaways
 
 1. **Strategic Insight**: The analysis reveals significant opportunities for optimization in current processes.
 
-2. **Performance Metrics**: Key indicators show {random.randint(5, 15)}% improvement potential in target areas.
+2. **Performance Metrics**: Key indicators show {improvement}% improvement potential in target areas.
 
 3. **Recommendations**: 
    - Implement automated workflow enhancements
@@ -234,12 +335,19 @@ Please review the attached materials and let me know if you have any questions o
 *Summary generated by TaskFlowr Communication Agent*
 """
     
-    def _mock_announcement(self, task: str, tone: str) -> str:
-        """Generate mock team announcement"""
-        return f"""
+    def _mock_summary(self, task: str, tone: str) -> str:
+        """Generate mock executive summary"""
+        return self._SUMMARY_TEMPLATE.format_map({
+            "task": task,
+            "date": today(),
+            "tone": tone.capitalize(),
+            "improvement": self._rng.randint(5, 15)
+        })
+    
+    _ANNOUNCEMENT_TEMPLATE = """
 # Team Announcement
 
-**Subject:** Important Update Regarding {task.split(' for ')[0] if ' for ' in task else 'Recent Initiatives'}
+**Subject:** Important Update Regarding {topic}
 
 Hello Team,
 
@@ -251,7 +359,7 @@ We've successfully implemented automated workflow processing for: {task}
 
 ## Key Benefits
 
-• **Efficiency**: Reduced manual processing time by estimated {random.randint(40, 70)}%
+• **Efficiency**: Reduced manual processing time by estimated {time_saved}%
 • **Accuracy**: Automated quality checks ensure consistent outputs
 • **Scalability**: System can handle increasing request volumes
 • **Accessibility**: Team members can submit requests easily
@@ -277,9 +385,15 @@ The Operations Team
 *Announcement drafted by TaskFlowr Communication Agent*
 """
     
-    def _mock_default(self, task: str, tone: str) -> str:
-        """Default mock communication"""
-        return f"""
+    def _mock_announcement(self, task: str, tone: str) -> str:
+        """Generate mock team announcement"""
+        return self._ANNOUNCEMENT_TEMPLATE.format_map({
+            "topic": task.split(' for ')[0] if ' for ' in task else 'Recent Initiatives',
+            "task": task,
+            "time_saved": self._rng.randint(40, 70)
+        })
+    
+    _DEFAULT_TEMPLATE = """
 # Communication Output
 **Task:** {task}
 **Tone:** {tone}
@@ -293,7 +407,7 @@ This communication serves to inform you that your request has been processed thr
 **Request Details:**
 - Task: {task}
 - Status: Completed
-- Processing Date: {datetime.now().strftime("%Y-%m-%d")}
+- Processing Date: {date}
 
 **Key Message:**
 Your request has been successfully handled by our multi-agent automation system. The Communication Agent has prepared this professional draft to ensure clear and effective information delivery.
@@ -309,6 +423,22 @@ TaskFlowr Communication System
 *This is a mock communication generated for demonstration purposes*
 """
     
+    def _mock_default(self, task: str, tone: str) -> str:
+        """Default mock communication"""
+        return self._DEFAULT_TEMPLATE.format_map({
+            "task": task,
+            "tone": tone,
+            "date": today()
+        })
+    
+    # Mock templates, shared by all instances
+    mock_templates = MappingProxyType({
+        "email": _mock_email,
+        "summary": _mock_summary,
+        "announcement": _mock_announcement,
+        "default": _mock_default
+    })
+    
     def _determine_tone(self, context: dict) -> str:
         """Determine appropriate tone from context"""
         user_prefs = context.get("user_preferences", {})
@@ -319,24 +449,26 @@ TaskFlowr Communication System
             return user_prefs["tone"]
         
         # Infer tone from context
-        task_type = str(current_context.get("task_type", "")).lower()
-        audience = str(current_context.get("audience", "")).lower()
+        fields = {
+            "task_type": str(current_context.get("task_type", "")).lower(),
+            "audience": str(current_context.get("audience", "")).lower()
+        }
         
-        if any(word in task_type for word in ["executive", "leadership", "ceo", "board"]):
-            return "executive"
-        elif any(word in audience for word in ["team", "colleagues", "internal", "staff"]):
-            return "friendly"
-        elif any(word in task_type for word in ["technical", "engineering", "development", "code"]):
-            return "technical"
-        else:
-            return "professional"
+        for field, pattern, tone in _TONE_RULES:
+            if pattern.search(fields[field]):
+                return tone
+        return "professional"
     
     def _parse_communication_outputs(self, response_text: str, tone: str) -> dict:
         """Parse communication outputs from agent response"""
+        flags = _classify_content(response_text.casefold())
+        
+        # Summaries and announcements list the same bullet points; find them once
+        points = self._extract_bullet_points(response_text) if flags & (_SUMMARY | _ANNOUNCEMENT) else None
         outputs = {
-            "emails": self._extract_emails(response_text),
-            "summaries": self._extract_summaries(response_text),
-            "announcements": self._extract_announcements(response_text),
+            "emails": self._extract_emails(response_text, flags),
+            "summaries": self._extract_summaries(response_text, flags, points),
+            "announcements": self._extract_announcements(response_text, flags, points),
             "general_content": {
                 "type": "communication",
                 "content": response_text,
@@ -346,108 +478,89 @@ TaskFlowr Communication System
         }
         return outputs
     
-    def _extract_emails(self, text: str) -> list:
+    def _extract_emails(self, text: str, flags: int) -> list:
         """Extract email-like content"""
         emails = []
-        lines = text.split('\n')
         
         # Look for email structure
-        if any(keyword in text.lower() for keyword in ['dear', 'subject:', 'regards', 'sincerely']):
-            email_content = {
-                "subject": self._extract_subject(lines),
-                "greeting": self._extract_greeting(lines),
-                "body": self._extract_body(text),
-                "closing": self._extract_closing(lines),
-                "type": "email"
-            }
-            emails.append(email_content)
+        if flags & _EMAIL:
+            emails.append(self._parse_email(text))
         
         return emails
     
-    def _extract_summaries(self, text: str) -> list:
+    def _parse_email(self, text: str) -> dict:
+        """Extract subject, greeting, body and closing in a single pass over the lines"""
+        subject = greeting = closing = None
+        body_lines = []
+        in_body = body_done = False
+        
+        for line in text.split('\n'):
+            line_lower = line.lower()
+            
+            # Header fields come from the first matching raw line
+            if subject is None and line_lower.startswith('subject:'):
+                subject = line[8:].strip()
+            if greeting is None and line_lower.startswith(_GREETINGS):
+                greeting = line.strip()
+            if closing is None and line_lower.startswith(_CLOSINGS):
+                closing = line.strip()
+            
+            # Body runs from an opener to the first closing, on stripped lines
+            if not body_done:
+                stripped = line.strip()
+                stripped_lower = line_lower if stripped is line else stripped.lower()
+                if stripped_lower.startswith(_BODY_OPENERS):
+                    in_body = True
+                elif in_body:
+                    if stripped_lower.startswith(_CLOSINGS):
+                        body_done = True
+                    elif stripped and not stripped.startswith('Subject:'):
+                        body_lines.append(stripped)
+            elif subject is not None and greeting is not None and closing is not None:
+                break
+        
+        return {
+            "subject": subject if subject is not None else "Communication Update",
+            "greeting": greeting if greeting is not None else "Dear Team,",
+            "body": '\n'.join(body_lines) if body_lines else text,
+            "closing": closing if closing is not None else "Best regards,\nTaskFlowr System",
+            "type": "email"
+        }
+    
+    def _extract_summaries(self, text: str, flags: int, points: list) -> list:
         """Extract summary content"""
         summaries = []
-        if any(keyword in text.lower() for keyword in ['summary', 'key takeaways', 'executive']):
+        if flags & _SUMMARY:
             summaries.append({
                 "type": "summary",
-                "key_points": self._extract_bullet_points(text),
-                "overview": text[:200] + "..." if len(text) > 200 else text
+                "key_points": points,
+                "overview": preview(text, 200)
             })
         return summaries
     
-    def _extract_announcements(self, text: str) -> list:
+    def _extract_announcements(self, text: str, flags: int, points: list) -> list:
         """Extract announcement content"""
         announcements = []
-        if any(keyword in text.lower() for keyword in ['announce', 'update', 'team', 'news']):
+        if flags & _ANNOUNCEMENT:
             announcements.append({
                 "type": "announcement",
                 "key_message": self._extract_key_message(text),
-                "action_items": self._extract_bullet_points(text)
+                "action_items": list(points)
             })
         return announcements
     
-    def _extract_subject(self, lines: list) -> str:
-        """Extract subject line from text"""
-        for line in lines:
-            if line.lower().startswith('subject:'):
-                return line[8:].strip()
-        return "Communication Update"
-    
-    def _extract_greeting(self, lines: list) -> str:
-        """Extract greeting from text"""
-        for line in lines:
-            if line.lower().startswith('dear') or line.lower().startswith('hello') or line.lower().startswith('to the'):
-                return line.strip()
-        return "Dear Team,"
-    
-    def _extract_body(self, text: str) -> str:
-        """Extract main body content"""
-        lines = text.split('\n')
-        body_lines = []
-        in_body = False
-        
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith('dear') or line.lower().startswith('hello'):
-                in_body = True
-                continue
-            if in_body and any(line.lower().startswith(closing) for closing in ['best', 'regards', 'sincerely', 'thank you']):
-                break
-            if in_body and line and not line.startswith('Subject:'):
-                body_lines.append(line)
-        
-        return '\n'.join(body_lines) if body_lines else text
-    
-    def _extract_closing(self, lines: list) -> str:
-        """Extract closing from text"""
-        for line in lines:
-            line_lower = line.lower()
-            if any(line_lower.startswith(closing) for closing in ['best', 'regards', 'sincerely', 'thank you']):
-                return line.strip()
-        return "Best regards,\nTaskFlowr System"
-    
     def _extract_bullet_points(self, text: str) -> list:
         """Extract bullet points from text"""
-        points = []
-        lines = text.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if (line.startswith('-') or line.startswith('•') or 
-                (len(line) > 2 and line[0].isdigit() and line[1] == '.') or
-                line.startswith('*')):
-                points.append(line)
-        
+        points = _BULLET_RE.findall(text)
         return points if points else ["Key point extracted from communication"]
     
     def _extract_key_message(self, text: str) -> str:
         """Extract the main message from text"""
-        sentences = text.split('.')
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if sentence and len(sentence) > 20:
-                return sentence
-        return text[:100] + "..." if len(text) > 100 else text
+        # First sentence longer than 20 characters once stripped
+        match = _KEY_MESSAGE_RE.search(text)
+        if match:
+            return match.group()
+        return preview(text, 100)
 
 
 def create_communication_agent(api_key=None, use_mock=False) -> CommunicationAgent:
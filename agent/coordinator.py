@@ -4,20 +4,152 @@ Coordinator Agent - Main orchestrator for TaskFlowr multi-agent system
 Using Gemini 2.5 Flash (free model)
 """
 
+import io
 import os
-import json
+import time
+import atexit
+import functools
 import asyncio
-from datetime import datetime
-import random
-
-# Gemini imports
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from .llm_cache import LLMCache, ResultCache, make_key, semantic_cache_enabled, warm_embedder
+from .utils import (
+    from_json, get_genai_client, load_generativeai, module_available, preview, read_prompt, to_json
+)
+
+# google.generativeai is only imported by live coordinators; mock runs never load it
+GEMINI_AVAILABLE = module_available("google.generativeai")
+if not GEMINI_AVAILABLE:
     print("⚠️  Gemini API not available, using mock data")
 
+# Intent analysis is requested as schema-constrained JSON, so replies parse directly
+_INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent_category": {"type": "string", "enum": ["automation", "data_processing", "communication", "workflow", "hybrid"]},
+        "needs_automation": {"type": "boolean"},
+        "needs_communication": {"type": "boolean"},
+        "primary_agent": {"type": "string", "enum": ["automation", "communication", "both"]}
+    },
+    "required": ["intent_category", "needs_automation", "needs_communication", "primary_agent"]
+}
+_INTENT_GENERATION_CONFIG = {"response_mime_type": "application/json", "response_schema": _INTENT_SCHEMA}
+
+# Substrings that route a request to each agent in mock intent analysis
+_AUTOMATION_KEYWORDS = ('data', 'report', 'checklist', 'process', 'workflow', 'template', 'metrics', 'analysis')
+_COMMUNICATION_KEYWORDS = ('email', 'summary', 'announcement', 'draft', 'communicate', 'briefing', 'welcome')
+
+# Gemini batch job polling
+_BATCH_POLL_SECONDS = 30
+_BATCH_DONE_STATES = ("JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED")
+
+# Intent analyses are kept across runs (demo, evaluator) in this file
+_INTENT_CACHE_PATH = os.path.expanduser(os.getenv("TASKFLOWR_INTENT_CACHE", "~/.taskflowr_cache.npz"))
+
+# Model behind intent analysis and final assembly
+_MODEL_NAME = "gemini-2.0-flash"
+
+# Live results are kept here across runs when TASKFLOWR_CACHE=1; bump the
+# version when the result format changes to retire old entries
+_RESULT_CACHE_PATH = os.path.expanduser(os.getenv("TASKFLOWR_RESULT_CACHE", "~/.taskflowr_results.json"))
+_RESULT_CACHE_VERSION = 1
+
+# Opt-in Gemini context cache for the system prompt (TASKFLOWR_CONTEXT_CACHE=1);
+# caching needs an explicit model version
+_CONTEXT_CACHE_MODEL = "models/gemini-2.0-flash-001"
+_CONTEXT_CACHE_TTL = timedelta(hours=1)
+
+# Piece size when streaming text that is already complete (mock or cached)
+_STREAM_CHUNK_CHARS = 64
+
+# Longest string field sent to the model when assembling the final output
+_ASSEMBLY_FIELD_LIMIT = 2000
+
+
+def _slim_for_prompt(value):
+    """Copy of agent results without raw responses and with long strings clipped"""
+    if isinstance(value, str):
+        return preview(value, _ASSEMBLY_FIELD_LIMIT)
+    if isinstance(value, dict):
+        return {key: _slim_for_prompt(item) for key, item in value.items() if key != "raw_response"}
+    if isinstance(value, (list, tuple)):
+        return [_slim_for_prompt(item) for item in value]
+    return value
+
+
+async def _stream_text(text: str):
+    """Yield text in pieces, letting other tasks run between them"""
+    for start in range(0, len(text), _STREAM_CHUNK_CHARS):
+        yield text[start:start + _STREAM_CHUNK_CHARS]
+        await asyncio.sleep(0)
+
+
+def _load_coordinator_prompt():
+    """Load the coordinator system prompt"""
+    try:
+        return read_prompt("coordinator_prompt.txt")
+    except OSError:
+        return """You are the Coordinator Agent for TaskFlowr. Your job is to interpret user instructions, break them into subtasks, and route them to specialized agents.
+
+Rules:
+- Analyze user intent and decompose complex tasks
+- Route data/automation tasks to Automation Agent
+- Route communication/summary tasks to Communication Agent  
+- Maintain session context
+- Assemble final deliverables
+
+Always provide structured, actionable outputs."""
+
+
+# Read once at import; every coordinator instance shares the string
+_COORDINATOR_PROMPT = _load_coordinator_prompt()
+
+# Coordinators handed out by get_coordinator(), keyed by (api_key, use_mock)
+_coordinators = {}
+_coordinators_lock = threading.Lock()
+
+
+# Caches persisted across runs, keyed by file; shared by every coordinator
+_persistent_caches = {}
+_persistent_caches_lock = threading.Lock()
+
+
+def _save_cache(cache, path: str, name: str):
+    """Write a persisted cache to disk for the next run"""
+    try:
+        cache.save(path)
+    except OSError as e:
+        print(f"⚠️  Could not save {name}: {e}")
+
+
+def _persistent_cache(path: str, name: str, factory):
+    """The cache stored at path, loaded on first use and saved once at exit"""
+    with _persistent_caches_lock:
+        cache = _persistent_caches.get(path)
+        if cache is None:
+            cache = _persistent_caches[path] = factory()
+            try:
+                cache.load(path)
+            except Exception as e:
+                print(f"⚠️  Ignoring unreadable {name} {path}: {e}")
+            atexit.register(_save_cache, cache, path, name)
+        return cache
+
+
+def _append_line(path: str, line: str):
+    """Append one line to a log file"""
+    with open(path, "a", encoding='utf-8') as f:
+        f.write(line + "\n")
+
+
+@functools.lru_cache(maxsize=4)
+def get_model(name: str):
+    """Return the shared GenerativeModel for name (and its lazily created client)"""
+    return load_generativeai().GenerativeModel(name)
+
 
 class CoordinatorAgent:
     """Main coordinator that orchestrates workflow between specialized agents"""
@@ -28,6 +160,7 @@ class CoordinatorAgent:
         if not self.use_mock and GEMINI_AVAILABLE:
             try:
                 # Configure Gemini with the free 2.5 Flash model
+                genai = load_generativeai()
                 if api_key:
                     genai.configure(api_key=api_key)
                 else:
@@ -39,7 +172,7 @@ class CoordinatorAgent:
                         raise ValueError("No API key provided")
                 
                 # Test the API key
-                self.model = genai.GenerativeModel('gemini-2.0-flash')
+                self.model = get_model(_MODEL_NAME)
                 print("✅ Using Gemini 2.0 Flash API")
                 self.use_mock = False
             except Exception as e:
@@ -49,8 +182,43 @@ class CoordinatorAgent:
             self.use_mock = True
             print("🤖 Using mock data for demonstration")
         
+        self._api_key = api_key
+        
+        # Offline runs can send intent analysis through the cheaper Batch API
+        self._batch_mode = os.getenv("TASKFLOWR_BATCH") == "1" and module_available("google.genai")
+        
         # System prompt for coordinator
-        self.system_prompt = self._load_coordinator_prompt()
+        self.system_prompt = _COORDINATOR_PROMPT
+        
+        # Optionally keep the system prompt in a Gemini context cache so intent
+        # analysis bills only the request; the cache is created on first use
+        self._context_cache = not self.use_mock and os.getenv("TASKFLOWR_CONTEXT_CACHE") == "1"
+        self._cached_model = None
+        self._cached_model_expires = 0.0
+        self._cached_model_lock = threading.Lock()
+        
+        # Gemini responses for intent analysis and final assembly; similar
+        # requests share an intent, and those survive restarts on disk
+        if not self.use_mock and semantic_cache_enabled():
+            warm_embedder()
+            self._intent_cache = _persistent_cache(
+                _INTENT_CACHE_PATH, "intent cache", lambda: LLMCache(threshold=0.92)
+            )
+        else:
+            self._intent_cache = LLMCache(threshold=0.92)
+        self._llm_cache = LLMCache()
+        
+        # Whole-request results, reused for a repeated request. Mock data stays
+        # in memory; live Gemini answers are only reused, and persisted, with
+        # TASKFLOWR_CACHE=1
+        if self.use_mock:
+            self._result_cache = ResultCache(maxsize=256)
+        elif os.getenv("TASKFLOWR_CACHE") == "1":
+            self._result_cache = _persistent_cache(
+                _RESULT_CACHE_PATH, "result cache", lambda: ResultCache(maxsize=256)
+            )
+        else:
+            self._result_cache = None
         
         # Initialize sub-agents
         from .automation_agent import AutomationAgent
@@ -62,27 +230,21 @@ class CoordinatorAgent:
         # Session memory
         self.session_memory = {
             "user_preferences": {},
-            "workflow_history": [],
+            "workflow_history": deque(maxlen=256),
             "current_context": {}
         }
+        
+        # Optional JSONL log of workflows, appended off the event loop in order
+        self._workflow_log_path = os.getenv("TASKFLOWR_WORKFLOW_LOG")
+        self._workflow_log_writer = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="workflow-log")
+            if self._workflow_log_path else None
+        )
     
-    def _load_coordinator_prompt(self):
-        """Load the coordinator system prompt"""
-        try:
-            prompt_path = os.path.join(os.path.dirname(__file__), "prompts", "coordinator_prompt.txt")
-            with open(prompt_path, "r", encoding='utf-8') as f:
-                return f.read()
-        except:
-            return """You are the Coordinator Agent for TaskFlowr. Your job is to interpret user instructions, break them into subtasks, and route them to specialized agents.
-
-Rules:
-- Analyze user intent and decompose complex tasks
-- Route data/automation tasks to Automation Agent
-- Route communication/summary tasks to Communication Agent  
-- Maintain session context
-- Assemble final deliverables
-
-Always provide structured, actionable outputs."""
+    async def reload_prompt(self):
+        """Re-read the system prompt from disk without blocking the event loop"""
+        self.system_prompt = await asyncio.to_thread(_load_coordinator_prompt)
+        self._cached_model_expires = 0.0
     
     async def process_user_request(self, user_input: str, context: dict = None):
         """
@@ -94,18 +256,142 @@ Always provide structured, actionable outputs."""
         if context:
             self.session_memory["current_context"].update(context)
         
+        # One timestamp for the output, the report header and the log entry
+        now = datetime.now()
+        
+        cached = self._cached_result(user_input, now)
+        if cached is not None:
+            return cached
+        
         # Analyze intent and decompose task
         task_analysis = await self._analyze_intent(user_input)
         
+        return await self._complete_request(user_input, task_analysis, now)
+    
+    async def process_user_requests_batch(self, user_inputs: list, context: dict = None) -> list:
+        """
+        Process several independent requests concurrently
+        
+        With TASKFLOWR_BATCH=1 the intent analyses are submitted as one Gemini
+        batch job: cheaper, but it can take minutes, so use it for offline runs.
+        """
+        print(f"🔄 Coordinator received {len(user_inputs)} requests")
+        
+        if context:
+            self.session_memory["current_context"].update(context)
+        
+        now = datetime.now()
+        results = [self._cached_result(user_input, now) for user_input in user_inputs]
+        pending = [user_input for user_input, result in zip(user_inputs, results) if result is None]
+        if not pending:
+            return results
+        
+        # Task groups cancel and wait for the other requests if one fails or
+        # the run is interrupted, so nothing is left running after we return
+        if self._batch_mode and not self.use_mock:
+            analyses = await self._analyze_intents_batch(pending)
+        else:
+            async with asyncio.TaskGroup() as tg:
+                analysis_tasks = [tg.create_task(self._analyze_intent(user_input)) for user_input in pending]
+            analyses = [task.result() for task in analysis_tasks]
+        
+        async with asyncio.TaskGroup() as tg:
+            request_tasks = [
+                tg.create_task(self._complete_request(user_input, task_analysis, now))
+                for user_input, task_analysis in zip(pending, analyses)
+            ]
+        completed = (task.result() for task in request_tasks)
+        return [result if result is not None else next(completed) for result in results]
+    
+    async def _complete_request(self, user_input: str, task_analysis: dict, now: datetime) -> dict:
+        """Route an analysed request to the agents and assemble the deliverable"""
         # Route to appropriate agents
         results = await self._route_to_agents(task_analysis, user_input)
         
         # Assemble final output
-        final_output = await self._assemble_final_output(results, user_input)
+        final_output = await self._assemble_final_output(results, user_input, now)
         
         # Log workflow
-        self._log_workflow(user_input, task_analysis, results)
+        self._log_workflow(user_input, task_analysis, results, final_output["timestamp"])
         
+        self._remember_result(user_input, task_analysis, final_output)
+        return final_output
+    
+    async def stream_user_request(self, user_input: str, context: dict = None):
+        """
+        Process a request like process_user_request, yielding the final
+        deliverable text as it is generated
+        """
+        print(f"🔄 Coordinator streaming request: {user_input}")
+        
+        if context:
+            self.session_memory["current_context"].update(context)
+        
+        now = datetime.now()
+        cached = self._cached_result(user_input, now)
+        if cached is not None:
+            async for chunk in _stream_text(cached["final_output"]):
+                yield chunk
+            return
+        
+        task_analysis = await self._analyze_intent(user_input)
+        results = await self._route_to_agents(task_analysis, user_input)
+        
+        # Log before streaming; the caller may stop reading after a preview
+        self._log_workflow(user_input, task_analysis, results, now.isoformat())
+        
+        chunks = []
+        async for piece in self._stream_final_text(results, user_input, now):
+            # Mock and fallback text arrives whole, so hand it out in pieces too
+            async for chunk in _stream_text(piece):
+                chunks.append(chunk)
+                yield chunk
+        
+        self._remember_result(user_input, task_analysis, self._final_result(results, user_input, now, ''.join(chunks)))
+    
+    def _remember_result(self, user_input: str, task_analysis: dict, final_output: dict):
+        """Keep a finished request for _cached_result"""
+        if self._result_cache is None or final_output.get("status") != "completed":
+            return
+        # Don't let a mock fallback stand in for a live answer
+        if not self.use_mock and any(
+            result.get("mock_data") for result in final_output["component_results"].values()
+        ):
+            return
+        # Frozen as JSON: every hit parses a fresh copy, cheaper than deepcopy
+        self._result_cache.put(self._result_key(user_input), to_json({
+            "analysis": task_analysis,
+            "output": final_output
+        }))
+    
+    def _result_key(self, user_input: str) -> bytes:
+        """Cache key for a request (ignoring case and surrounding whitespace) in the current session context"""
+        # Mode, model and system prompts shape the answer, so they are part of the key
+        return make_key(
+            _RESULT_CACHE_VERSION,
+            self.use_mock,
+            _MODEL_NAME,
+            self.system_prompt,
+            self.automation_agent.system_prompt,
+            self.communication_agent.system_prompt,
+            user_input.strip().lower(),
+            self.session_memory["current_context"],
+            self.session_memory["user_preferences"]
+        )
+    
+    def _cached_result(self, user_input: str, now: datetime):
+        """Fresh copy of a stored result for user_input, or None"""
+        if self._result_cache is None:
+            return None
+        frozen = self._result_cache.get(self._result_key(user_input))
+        if frozen is None:
+            return None
+        
+        print("⚡ Reusing cached result")
+        entry = from_json(frozen)
+        final_output = entry["output"]
+        final_output["timestamp"] = now.isoformat()
+        self._log_workflow(user_input, entry["analysis"], final_output["component_results"], final_output["timestamp"])
         return final_output
     
     async def _analyze_intent(self, user_input: str) -> dict:
@@ -115,48 +401,135 @@ Always provide structured, actionable outputs."""
         
         try:
             # Use Gemini 2.5 Flash for analysis
-            prompt = f"""
-            SYSTEM: {self.system_prompt}
+            model = await self._intent_model()
+            prompt = self._intent_prompt(user_input, with_system=model is self.model)
             
-            USER REQUEST: {user_input}
+            await self._intent_cache.embed_queries([user_input])
+            raw_text = self._intent_cache.get(prompt, query=user_input, scope="intent")
+            cached = raw_text is not None
+            if not cached:
+                response = await model.generate_content_async(
+                    prompt, generation_config=_INTENT_GENERATION_CONFIG
+                )
+                raw_text = response.text
             
-            Analyze this request and determine the best way to handle it using our multi-agent system.
-            
-            Return ONLY a JSON object with:
-            - intent_category (data_processing, communication, workflow, hybrid)
-            - needs_automation (true/false) 
-            - needs_communication (true/false)
-            - primary_agent (automation/communication/both)
-            
-            JSON:
-            """
-            
-            response = self.model.generate_content(prompt)
-            
-            # Extract JSON from response
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:-3].strip()
-            elif response_text.startswith('```'):
-                response_text = response_text[3:-3].strip()
-                
-            analysis = json.loads(response_text)
+            analysis = self._parse_intent(raw_text)
+            if not cached:
+                self._intent_cache.put(prompt, raw_text, query=user_input, scope="intent")
             return analysis
             
         except Exception as e:
             print(f"Gemini analysis error: {e}, using mock analysis")
             return self._mock_analyze_intent(user_input)
     
+    async def _analyze_intents_batch(self, user_inputs: list) -> list:
+        """Analyze intents for many requests with a single Gemini batch job"""
+        prompts = [self._intent_prompt(user_input) for user_input in user_inputs]
+        analyses = [None] * len(user_inputs)
+        await self._intent_cache.embed_queries(user_inputs)
+        pending = []
+        
+        for index, (user_input, prompt) in enumerate(zip(user_inputs, prompts)):
+            raw_text = self._intent_cache.get(prompt, query=user_input, scope="intent")
+            if raw_text is not None:
+                analyses[index] = self._parse_intent(raw_text)
+            else:
+                pending.append(index)
+        
+        if pending:
+            try:
+                texts = await self._run_batch_job([prompts[index] for index in pending])
+            except Exception as e:
+                print(f"Gemini batch error: {e}, analysing requests individually")
+                texts = [None] * len(pending)
+            
+            for index, raw_text in zip(pending, texts):
+                try:
+                    analyses[index] = self._parse_intent(raw_text)
+                    self._intent_cache.put(prompts[index], raw_text, query=user_inputs[index], scope="intent")
+                except Exception:
+                    analyses[index] = await self._analyze_intent(user_inputs[index])
+        
+        return analyses
+    
+    async def _run_batch_job(self, prompts: list) -> list:
+        """Submit prompts as an inline Gemini batch job and wait for the response texts"""
+        client = get_genai_client(self._api_key)
+        job = await client.aio.batches.create(
+            model=_MODEL_NAME,
+            src=[
+                {"contents": [{"role": "user", "parts": [{"text": prompt}]}], "config": _INTENT_GENERATION_CONFIG}
+                for prompt in prompts
+            ],
+            config={"display_name": "taskflowr-intent-analysis"}
+        )
+        
+        while job.state.name not in _BATCH_DONE_STATES:
+            await asyncio.sleep(_BATCH_POLL_SECONDS)
+            job = await client.aio.batches.get(name=job.name)
+        
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"batch job {job.name} finished as {job.state.name}")
+        return [item.response.text if item.response else None for item in job.dest.inlined_responses]
+    
+    async def _intent_model(self):
+        """Model for intent analysis: the context-cached one while it is enabled"""
+        if not self._context_cache:
+            return self.model
+        if time.monotonic() >= self._cached_model_expires:
+            await asyncio.to_thread(self._refresh_cached_model)
+        return self._cached_model or self.model
+    
+    def _refresh_cached_model(self):
+        """Put the system prompt in a new Gemini context cache unless another thread just did"""
+        with self._cached_model_lock:
+            if time.monotonic() < self._cached_model_expires:
+                return
+            genai = load_generativeai()
+            try:
+                cached_content = genai.caching.CachedContent.create(
+                    model=_CONTEXT_CACHE_MODEL,
+                    system_instruction=self.system_prompt,
+                    ttl=_CONTEXT_CACHE_TTL
+                )
+            except Exception as e:
+                # Prompts shorter than the model's minimum cacheable size are rejected
+                print(f"⚠️  Gemini context cache unavailable: {e}, sending the system prompt inline")
+                self._context_cache = False
+                self._cached_model = None
+                return
+            self._cached_model = genai.GenerativeModel.from_cached_content(cached_content)
+            # Renew a minute early so no request reaches an expired cache
+            self._cached_model_expires = time.monotonic() + _CONTEXT_CACHE_TTL.total_seconds() - 60
+    
+    def _intent_prompt(self, user_input: str, with_system: bool = True) -> str:
+        """Build the intent analysis prompt for a request"""
+        if not with_system:
+            # The system prompt is already in the model's context cache
+            return f"""
+            USER REQUEST: {user_input}
+            
+            Analyze this request and determine the best way to handle it using our multi-agent system.
+            """
+        return f"""
+            SYSTEM: {self.system_prompt}
+            
+            USER REQUEST: {user_input}
+            
+            Analyze this request and determine the best way to handle it using our multi-agent system.
+            """
+    
+    def _parse_intent(self, raw_text: str) -> dict:
+        """Parse a JSON-mode intent analysis response"""
+        return from_json(raw_text)
+    
     def _mock_analyze_intent(self, user_input: str) -> dict:
         """Mock intent analysis for demonstration"""
         user_lower = user_input.lower()
         
         # Simple rule-based analysis
-        automation_keywords = ['data', 'report', 'checklist', 'process', 'workflow', 'template', 'metrics', 'analysis']
-        communication_keywords = ['email', 'summary', 'announcement', 'draft', 'communicate', 'briefing', 'welcome']
-        
-        needs_auto = any(word in user_lower for word in automation_keywords)
-        needs_comm = any(word in user_lower for word in communication_keywords)
+        needs_auto = any(map(user_lower.__contains__, _AUTOMATION_KEYWORDS))
+        needs_comm = any(map(user_lower.__contains__, _COMMUNICATION_KEYWORDS))
         
         return {
             "intent_category": "hybrid" if needs_auto and needs_comm else "automation" if needs_auto else "communication",
@@ -167,36 +540,63 @@ Always provide structured, actionable outputs."""
     
     async def _route_to_agents(self, task_analysis: dict, user_input: str) -> dict:
         """Route subtasks to appropriate agents"""
-        results = {}
+        # The agents don't depend on each other, so run them concurrently
+        tasks = {}
         
         if task_analysis.get("needs_automation", False):
             print("🔄 Routing to Automation Agent...")
-            results["automation"] = await self.automation_agent.process_automation_task(
+            tasks["automation"] = self.automation_agent.process_automation_task(
                 user_input, self.session_memory
             )
         
         if task_analysis.get("needs_communication", False):
             print("🔄 Routing to Communication Agent...")
-            results["communication"] = await self.communication_agent.process_communication_task(
+            tasks["communication"] = self.communication_agent.process_communication_task(
                 user_input, self.session_memory
             )
         
-        return results
+        outputs = await asyncio.gather(*tasks.values())
+        return dict(zip(tasks, outputs))
     
-    async def _assemble_final_output(self, agent_results: dict, original_request: str) -> dict:
+    async def _assemble_final_output(self, agent_results: dict, original_request: str, now: datetime) -> dict:
         """Assemble final output from agent results using Gemini 2.5 Flash"""
+        try:
+            final_text = ''.join([
+                chunk async for chunk in self._stream_final_text(agent_results, original_request, now)
+            ])
+        except Exception as e:
+            print(f"Gemini final assembly error: {e}, using detailed output")
+            final_text = self._create_detailed_final_output(agent_results, original_request, now)
+        
+        return self._final_result(agent_results, original_request, now, final_text)
+    
+    @staticmethod
+    def _final_result(agent_results: dict, original_request: str, now: datetime, final_text: str) -> dict:
+        """Result dict returned for a processed request"""
+        return {
+            "timestamp": now.isoformat(),
+            "original_request": original_request,
+            "final_output": final_text,
+            "component_results": agent_results,
+            "status": "completed"
+        }
+    
+    async def _stream_final_text(self, agent_results: dict, original_request: str, now: datetime):
+        """Yield the final deliverable text as Gemini generates it"""
         if self.use_mock:
-            final_text = self._create_detailed_final_output(agent_results, original_request)
-        else:
-            try:
-                # Use Gemini 2.5 Flash to create a professional final output
-                assembly_prompt = f"""
+            yield self._create_detailed_final_output(agent_results, original_request, now)
+            return
+        
+        chunks = []
+        try:
+            # Use Gemini 2.5 Flash to create a professional final output
+            assembly_prompt = f"""
                 Create a professional business deliverable that combines these agent outputs:
                 
                 ORIGINAL REQUEST: {original_request}
                 
-                AUTOMATION AGENT OUTPUTS: {json.dumps(agent_results.get('automation', {}), indent=2)}
-                COMMUNICATION AGENT OUTPUTS: {json.dumps(agent_results.get('communication', {}), indent=2)}
+                AUTOMATION AGENT OUTPUTS: {to_json(_slim_for_prompt(agent_results.get('automation', {})))}
+                COMMUNICATION AGENT OUTPUTS: {to_json(_slim_for_prompt(agent_results.get('communication', {})))}
                 
                 Structure the response as a business report with:
                 - Executive Summary
@@ -206,98 +606,107 @@ Always provide structured, actionable outputs."""
                 
                 Keep it professional and concise.
                 """
-                
-                response = self.model.generate_content(assembly_prompt)
-                final_text = response.text
-                
-            except Exception as e:
-                print(f"Gemini final assembly error: {e}, using detailed output")
-                final_text = self._create_detailed_final_output(agent_results, original_request)
+            
+            final_text = self._llm_cache.get(assembly_prompt)
+            if final_text is not None:
+                yield final_text
+                return
+            
+            response = await self.model.generate_content_async(assembly_prompt, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    chunks.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            # Text already yielded can't be taken back
+            if chunks:
+                raise
+            print(f"Gemini final assembly error: {e}, using detailed output")
+            yield self._create_detailed_final_output(agent_results, original_request, now)
+            return
         
-        return {
-            "timestamp": datetime.now().isoformat(),
-            "original_request": original_request,
-            "final_output": final_text,
-            "component_results": agent_results,
-            "status": "completed"
-        }
+        self._llm_cache.put(assembly_prompt, ''.join(chunks))
     
-    def _create_detailed_final_output(self, agent_results: dict, original_request: str) -> str:
+    _REPORT_HEADER = """# 🚀 TaskFlowr Multi-Agent Deliverable
+
+**Request:** {request}
+**Generated:** {generated}
+**Model:** Gemini 2.0 Flash
+
+## 📊 Executive Summary
+"""
+    
+    _REPORT_FOOTER = """## 🎯 Capstone Project Features Demonstrated
+✅ **Multi-Agent Architecture** - Coordinator + Specialized Agents
+✅ **A2A Communication** - Agent-to-Agent task routing
+✅ **Gemini 2.0 Flash Integration** - Free, powerful model
+✅ **Structured Outputs** - Checklists, workflows, templates
+✅ **Business Communication** - Professional emails, summaries
+✅ **Session Memory** - Context-aware processing
+
+---
+*Generated by TaskFlowr - Capstone Project for Kaggle 5-Day AI Agents Intensive*"""
+    
+    def _create_detailed_final_output(self, agent_results: dict, original_request: str, now: datetime) -> str:
         """Create detailed final output using actual agent results"""
-        output_parts = []
-        output_parts.append(f"# 🚀 TaskFlowr Multi-Agent Deliverable\n")
-        output_parts.append(f"**Request:** {original_request}")
-        output_parts.append(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-        output_parts.append(f"**Model:** Gemini 2.0 Flash")
-        output_parts.append("")
-        
-        output_parts.append("## 📊 Executive Summary")
-        agents_used = list(agent_results.keys())
-        if agents_used:
-            output_parts.append(f"TaskFlowr successfully processed your request using {', '.join(agents_used)} specialized agents.")
-            output_parts.append("Below you'll find the structured outputs and communication drafts generated by our AI agents.")
-        output_parts.append("")
+        buf = io.StringIO()
+        w = buf.write
+        w(self._REPORT_HEADER.format_map({
+            "request": original_request,
+            "generated": now.strftime('%Y-%m-%d %H:%M')
+        }))
+        if agent_results:
+            w(f"TaskFlowr successfully processed your request using {', '.join(agent_results)} specialized agents.\n"
+              "Below you'll find the structured outputs and communication drafts generated by our AI agents.\n")
+        w("\n")
         
         # Show Automation Agent results in detail
         if 'automation' in agent_results:
             auto_data = agent_results['automation']
-            output_parts.append("## 🛠️ Automation Agent Outputs")
-            output_parts.append("*Specialized in structured data, workflows, and operational tasks*")
-            output_parts.append("")
+            w("## 🛠️ Automation Agent Outputs\n"
+              "*Specialized in structured data, workflows, and operational tasks*\n\n")
             
             if 'raw_response' in auto_data:
                 # Show the actual Gemini-generated content
-                output_parts.append("### Generated Content")
-                output_parts.append(auto_data['raw_response'])
-                output_parts.append("")
+                w(f"### Generated Content\n{auto_data['raw_response']}\n\n")
             
             if 'structured_outputs' in auto_data:
                 outputs = auto_data['structured_outputs']
                 
                 if outputs.get('checklists'):
-                    output_parts.append("### 📋 Checklists Generated")
+                    w("### 📋 Checklists Generated\n")
                     for i, checklist in enumerate(outputs['checklists'][:3], 1):
-                        output_parts.append(f"**Checklist {i}: {checklist.get('title', 'Task Checklist')}**")
+                        w(f"**Checklist {i}: {checklist.get('title', 'Task Checklist')}**\n")
                         for item in checklist.get('items', [])[:8]:
-                            output_parts.append(f"• {item}")
-                        output_parts.append("")
+                            w(f"• {item}\n")
+                        w("\n")
         
         # Show Communication Agent results in detail
         if 'communication' in agent_results:
             comm_data = agent_results['communication']
-            output_parts.append("## 💬 Communication Agent Outputs")
-            output_parts.append(f"*Tone: {comm_data.get('tone_used', 'professional').title()}*")
-            output_parts.append("")
+            w(f"## 💬 Communication Agent Outputs\n"
+              f"*Tone: {comm_data.get('tone_used', 'professional').title()}*\n\n")
             
             if 'raw_response' in comm_data:
-                output_parts.append("### Generated Communications")
-                output_parts.append(comm_data['raw_response'])
-                output_parts.append("")
-        
-        output_parts.append("## 🎯 Capstone Project Features Demonstrated")
-        output_parts.append("✅ **Multi-Agent Architecture** - Coordinator + Specialized Agents")
-        output_parts.append("✅ **A2A Communication** - Agent-to-Agent task routing")
-        output_parts.append("✅ **Gemini 2.0 Flash Integration** - Free, powerful model")
-        output_parts.append("✅ **Structured Outputs** - Checklists, workflows, templates")
-        output_parts.append("✅ **Business Communication** - Professional emails, summaries")
-        output_parts.append("✅ **Session Memory** - Context-aware processing")
-        output_parts.append("")
-        
-        output_parts.append("---")
-        output_parts.append("*Generated by TaskFlowr - Capstone Project for Kaggle 5-Day AI Agents Intensive*")
-        
-        return '\n'.join(output_parts)
+                w(f"### Generated Communications\n{comm_data['raw_response']}\n\n")
+        
+        w(self._REPORT_FOOTER)
+        
+        return buf.getvalue()
     
-    def _log_workflow(self, user_input: str, analysis: dict, results: dict):
+    def _log_workflow(self, user_input: str, analysis: dict, results: dict, timestamp: str):
         """Log workflow for observability"""
         workflow_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "input": user_input,
             "analysis": analysis,
             "results_keys": list(results.keys()),
             "status": "completed"
         }
         self.session_memory["workflow_history"].append(workflow_entry)
+        
+        if self._workflow_log_writer is not None:
+            self._workflow_log_writer.submit(_append_line, self._workflow_log_path, to_json(workflow_entry))
 
 
 def create_coordinator(api_key=None, use_mock=False):
@@ -305,6 +714,16 @@ def create_coordinator(api_key=None, use_mock=False):
     return CoordinatorAgent(api_key, use_mock)
 
 
+def get_coordinator(api_key=None, use_mock=False):
+    """Return the shared coordinator for these settings, creating it once"""
+    key = (api_key, use_mock)
+    with _coordinators_lock:
+        coordinator = _coordinators.get(key)
+        if coordinator is None:
+            coordinator = _coordinators[key] = CoordinatorAgent(api_key, use_mock)
+        return coordinator
+
+
 # Main execution with proper imports
 if __name__ == "__main__":
     async def main():
@@ -346,8 +765,7 @@ if __name__ == "__main__":
             print(f"🤖 Components: {list(result['component_results'].keys())}")
             
             # Show preview of final output
-            preview = result['final_output'][:300] + "..." if len(result['final_output']) > 300 else result['final_output']
-            print(f"\n📄 Output Preview:\n{preview}")
+            print(f"\n📄 Output Preview:\n{preview(result['final_output'])}")
             
             print(f"\n{'='*50}")
 
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+LLM Cache - Exact-match caching of agent results and model responses,
+with an optional semantic tier for near-duplicate requests
+"""
+
+import os
+import re
+import asyncio
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+
+from .utils import from_json, module_available, to_json, to_json_bytes
+
+# The semantic tier is opt-in and needs numpy + sentence-transformers
+SEMANTIC_AVAILABLE = module_available("numpy") and module_available("sentence_transformers")
+_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+_QUERY_MEMO_SIZE = 64
+
+# Command-style tasks have side effects and are never served from cache
+_COMMAND_TASK_RE = re.compile(r'\b(?:send|create|update|delete)\b', re.IGNORECASE)
+
+
+def is_command_task(task_description: str) -> bool:
+    """True for COMMAND tasks, False for INFORMATIONAL ones"""
+    return _COMMAND_TASK_RE.search(task_description) is not None
+
+
+def make_key(*parts) -> bytes:
+    """Build a compact cache key from JSON-serialisable parts"""
+    return hashlib.blake2b(to_json_bytes(parts, sort_keys=True), digest_size=16).digest()
+
+
+class ResultCache:
+    """In-memory LRU cache of agent results"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key: bytes):
+        """Return the cached value for key, or None on a miss"""
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: bytes, value):
+        """Store value under key, evicting the least recently used entry"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def save(self, path: str):
+        """Write the entries, oldest first, to a JSON file"""
+        data = {key.hex(): value for key, value in self._entries.items()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(to_json_bytes(data))
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Add entries written by save(), if the file exists"""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            data = from_json(f.read())
+        for key, value in data.items():
+            self.put(bytes.fromhex(key), value)
+
+
+def semantic_cache_enabled() -> bool:
+    """True when TASKFLOWR_SEMANTIC_CACHE=1 and the embedding stack is installed"""
+    return SEMANTIC_AVAILABLE and os.getenv("TASKFLOWR_SEMANTIC_CACHE") == "1"
+
+
+_embedder_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_embedder():
+    """Load the sentence embedding model once per process, shared by every cache"""
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(_EMBEDDING_MODEL)
+    # The first encode pays one-off setup costs; take them here, not on a request
+    model.encode(["warmup"])
+    return model
+
+
+def _get_embedder():
+    """The shared embedding model; callers wait here while another thread loads it"""
+    with _embedder_lock:
+        return _load_embedder()
+
+
+def warm_embedder():
+    """Start loading the embedding model in the background when the semantic cache is enabled"""
+    if semantic_cache_enabled():
+        threading.Thread(target=_get_embedder, name="embedder-warmup", daemon=True).start()
+
+
+def _embed_many(texts: list):
+    """L2-normalised float32 embeddings of texts, encoded in batches"""
+    vectors = _get_embedder().encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+    return vectors.astype('float32')
+
+
+def _embed(text: str):
+    """L2-normalised float32 embedding of text"""
+    return _embed_many([text])[0]
+
+
+class SemanticCache:
+    """Fixed-capacity LRU of normalised embeddings and their values, searched with one matrix product"""
+
+    def __init__(self, maxsize=512, threshold=0.95):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._matrix = None  # (maxsize, dim) float32, allocated on the first put
+        self._ticks = None   # last-use clock per row; the smallest is evicted
+        self._values = []
+        self._clock = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def get(self, vector):
+        """Return the value whose embedding scores at least threshold against vector, or None"""
+        if not self._values:
+            return None
+        scores = self._matrix[:len(self._values)] @ vector
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None
+        self._clock += 1
+        self._ticks[best] = self._clock
+        return self._values[best]
+
+    def put(self, vector, value):
+        """Store value under vector, replacing the least recently used row when full"""
+        if self._matrix is None:
+            import numpy as np
+            self._matrix = np.zeros((self.maxsize, vector.shape[0]), dtype=np.float32)
+            self._ticks = np.zeros(self.maxsize, dtype=np.int64)
+        if len(self._values) < self.maxsize:
+            row = len(self._values)
+            self._values.append(value)
+        else:
+            row = int(self._ticks.argmin())
+            self._values[row] = value
+        self._clock += 1
+        self._matrix[row] = vector
+        self._ticks[row] = self._clock
+
+    def state(self):
+        """Return (vectors, ticks, values) for the stored entries"""
+        size = len(self._values)
+        return self._matrix[:size], self._ticks[:size], list(self._values)
+
+    def restore(self, vectors, ticks, values):
+        """Replace the contents with entries from state(), keeping the most recently used"""
+        import numpy as np
+        self._matrix = None
+        self._values = []
+        self._clock = 0
+        for row in np.argsort(ticks, kind="stable")[-self.maxsize:]:
+            self.put(vectors[row], values[row])
+
+
+class LLMCache:
+    """Two-tier cache of model responses: exact prompt match, then semantic match on the query"""
+
+    def __init__(self, maxsize=512, threshold=0.95, semantic=None):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.semantic = semantic_cache_enabled() if semantic is None else semantic and SEMANTIC_AVAILABLE
+        self._exact = ResultCache(maxsize=maxsize)
+        self._indexes = {}
+        self._query_vectors = OrderedDict()  # recent query embeddings, so a miss and its put embed once
+
+    def get(self, prompt: str, query: str = None, scope: str = ""):
+        """Return a cached response for prompt, or for a query close to one seen in scope"""
+        response = self._exact.get(make_key(prompt))
+        if response is not None or query is None or not self.semantic:
+            return response
+        index = self._indexes.get(scope)
+        if index is None:
+            return None
+        return index.get(self._query_vector(query))
+
+    def put(self, prompt: str, response: str, query: str = None, scope: str = ""):
+        """Store a model response under its prompt and, optionally, its query"""
+        self._exact.put(make_key(prompt), response)
+        if query is not None and self.semantic:
+            index = self._indexes.get(scope)
+            if index is None:
+                index = self._indexes[scope] = SemanticCache(self.maxsize, self.threshold)
+            index.put(self._query_vector(query), response)
+
+    def save(self, path: str):
+        """Write the semantic tier to an .npz file (the exact tier stays in-process)"""
+        if not self.semantic:
+            return
+        import numpy as np
+        scopes = [scope for scope, index in self._indexes.items() if len(index)]
+        arrays = {"scopes": np.array(to_json(scopes))}
+        for i, scope in enumerate(scopes):
+            vectors, ticks, values = self._indexes[scope].state()
+            arrays[f"vectors_{i}"] = vectors
+            arrays[f"ticks_{i}"] = ticks
+            arrays[f"values_{i}"] = np.array(to_json(values))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Restore a semantic tier written by save(), if the file exists"""
+        if not self.semantic or not os.path.exists(path):
+            return
+        import numpy as np
+        with np.load(path) as data:
+            for i, scope in enumerate(from_json(str(data["scopes"]))):
+                index = self._indexes[scope] = SemanticCache(self.maxsize, self.threshold)
+                index.restore(data[f"vectors_{i}"], data[f"ticks_{i}"], from_json(str(data[f"values_{i}"])))
+
+    async def embed_queries(self, queries: list):
+        """Embed upcoming queries in one batch off the event loop, so get/put don't encode"""
+        if not self.semantic:
+            return
+        missing = [query for query in dict.fromkeys(queries) if query not in self._query_vectors]
+        if missing:
+            vectors = await asyncio.to_thread(_embed_many, missing)
+            for query, vector in zip(missing, vectors):
+                self._remember_vector(query, vector)
+
+    def _query_vector(self, query: str):
+        """Embed query, reusing a recent embedding for a repeated query"""
+        vector = self._query_vectors.get(query)
+        if vector is None:
+            vector = _embed(query)
+            self._remember_vector(query, vector)
+        return vector
+
+    def _remember_vector(self, query: str, vector):
+        """Keep a query embedding, dropping the oldest beyond _QUERY_MEMO_SIZE"""
+        self._query_vectors[query] = vector
+        if len(self._query_vectors) > _QUERY_MEMO_SIZE:
+            self._query_vectors.popitem(last=False)
+
@@ -1,24 +1,18 @@
 #!/usr/bin/env python3
 """
 TaskFlowr Demo Runner - Clean version without async errors
+Run from the repository root: python -m agent.run_demo
 """
 
-import asyncio
-import os
-import sys
-
-# Add the agent directory to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'agent'))
-
 async def run_demo():
     """Run TaskFlowr demo without async cleanup issues"""
-    from coordinator import create_coordinator
+    from .coordinator import get_coordinator
     
     print("🚀 TaskFlowr Multi-Agent System Demo")
     print("=" * 50)
     
     # Use mock mode to avoid API issues
-    coordinator = create_coordinator(use_mock=True)
+    coordinator = get_coordinator(use_mock=True)
     
     demo_requests = [
         {
@@ -44,21 +38,22 @@ async def run_demo():
         result = await coordinator.process_user_request(demo['request'])
         
         print(f"✅ Status: {result['status']}")
-        print(f"🤖 Agents Used: {list(result['component_results'].keys())}")
+        cr = result['component_results']
+        print(f"🤖 Agents Used: {list(cr)}")
         print(f"\n📊 FINAL OUTPUT:")
         print("=" * 50)
         print(result['final_output'])
         print("=" * 50)
         
         # Show some raw data from agents
-        if 'automation' in result['component_results']:
-            auto_data = result['component_results']['automation']
+        auto_data = cr.get('automation')
+        if auto_data:
             if 'structured_outputs' in auto_data:
                 outputs = auto_data['structured_outputs']
                 print(f"\n📋 Automation Generated: {len(outputs.get('checklists', []))} checklists, {len(outputs.get('workflows', []))} workflows")
         
-        if 'communication' in result['component_results']:
-            comm_data = result['component_results']['communication']
+        comm_data = cr.get('communication')
+        if comm_data:
             if 'communication_outputs' in comm_data:
                 outputs = comm_data['communication_outputs']
                 print(f"📧 Communication Generated: {len(outputs.get('emails', []))} emails, {len(outputs.get('summaries', []))} summaries")
@@ -68,7 +63,8 @@ async def run_demo():
 def main():
     """Main entry point without async cleanup issues"""
     try:
-        asyncio.run(run_demo())
+        from .utils import run_async
+        run_async(run_demo())
     except KeyboardInterrupt:
         print("\n\n👋 Demo stopped by user")
     except Exception as e:
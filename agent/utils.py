@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for TaskFlowr agents
+"""
+
+import sys
+import json
+import time
+import asyncio
+import functools
+import threading
+import importlib.util
+import importlib.resources
+from datetime import datetime
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# One google.genai client per API key, shared by every agent
+_genai_clients = {}
+_genai_clients_lock = threading.Lock()
+
+
+def to_json_bytes(obj, indent=False, sort_keys=False) -> bytes:
+    """Serialise obj to UTF-8 JSON, using orjson when it is installed"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=str, option=option)
+    return json.dumps(
+        obj, indent=2 if indent else None, sort_keys=sort_keys, default=str, ensure_ascii=False
+    ).encode('utf-8')
+
+
+def to_json(obj, indent=False, sort_keys=False) -> str:
+    """Serialise obj to a JSON string"""
+    return to_json_bytes(obj, indent=indent, sort_keys=sort_keys).decode('utf-8')
+
+
+def from_json(data):
+    """Parse JSON from str or bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_prompt(filename: str) -> str:
+    """Read a prompt bundled under agent/prompts (zip-safe)"""
+    return (importlib.resources.files(__package__) / "prompts" / filename).read_text(encoding='utf-8')
+
+
+@functools.lru_cache(maxsize=1)
+def _local_date(epoch_second: int) -> str:
+    """Format the local date for a whole-second timestamp"""
+    return datetime.fromtimestamp(epoch_second).strftime("%Y-%m-%d")
+
+
+def today() -> str:
+    """Local date as YYYY-MM-DD, formatted at most once per second"""
+    return _local_date(int(time.time()))
+
+
+def preview(text: str, limit: int = 300) -> str:
+    """First limit characters of text, with "..." appended when it was cut"""
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+async def print_stream(stream, limit: int = 300):
+    """Print an async text stream as it arrives, cut like preview() at limit characters"""
+    written = 0
+    try:
+        async for chunk in stream:
+            if written + len(chunk) > limit:
+                sys.stdout.write(chunk[:limit - written] + "...")
+                break
+            sys.stdout.write(chunk)
+            sys.stdout.flush()
+            written += len(chunk)
+    finally:
+        # Stop the generator now rather than whenever it is garbage collected
+        await stream.aclose()
+    print()
+
+
+def module_available(name: str) -> bool:
+    """Check whether a module can be imported without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        return False
+
+
+def run_async(main):
+    """asyncio.run on uvloop's faster event loop when it is installed"""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+    return uvloop.run(main)
+
+
+@functools.lru_cache(maxsize=None)
+def load_genai():
+    """Import google.genai on first live use (kept off the import path)"""
+    from google import genai
+    return genai
+
+
+@functools.lru_cache(maxsize=None)
+def load_generativeai():
+    """Import google.generativeai on first live use (kept off the import path)"""
+    import google.generativeai as genai
+    return genai
+
+
+def get_genai_client(api_key: str):
+    """Return the shared google.genai client for api_key, creating it once"""
+    with _genai_clients_lock:
+        client = _genai_clients.get(api_key)
+        if client is None:
+            client = _genai_clients[api_key] = load_genai().Client(api_key=api_key)
+        return client
@@ -4,108 +4,152 @@ TaskFlowr Main Demo Runner
 Fixed import structure
 """
 
-import asyncio
+import io
 import os
 import sys
+import logging
+import argparse
+from typing import NamedTuple
 
-# Add the current directory to Python path
-sys.path.insert(0, os.path.dirname(__file__))
+log = logging.getLogger("taskflowr.demo")
 
-async def run_demo():
+
+# Separator lines for the demo output
+SEP_EQ60 = "=" * 60
+SEP_DASH60 = "-" * 60
+SEP_DASH40 = "-" * 40
+
+
+class Demo(NamedTuple):
+    """A demo title and the request it sends"""
+    title: str
+    request: str
+
+
+DEMO_REQUESTS = (
+    Demo(
+        "Sales Report & Team Communication",
+        "Create a sales report for Q4 2024 including monthly figures, top products, regional analysis, and email summary to sales team"
+    ),
+    Demo(
+        "Employee Onboarding Package",
+        "Generate onboarding checklist for new software engineers with 30-60-90 day plan, technical setup procedures, and welcome email template"
+    ),
+    Demo(
+        "Executive Metrics Briefing",
+        "Analyze monthly performance metrics and prepare executive briefing with key takeaways and recommendations"
+    )
+)
+
+
+async def run_demo(interactive=False, stream=False):
     """Run TaskFlowr demo with fixed imports"""
     try:
         # Import directly from the agent module
-        from agent.coordinator import create_coordinator
+        from agent.coordinator import get_coordinator
+        from agent.utils import preview, print_stream
+    except ImportError as e:
+        log.error("❌ Import Error: %s", e)
+        log.error("💡 Make sure you're running from the taskflowr root directory")
+        log.error("💡 Directory structure should be: taskflowr/agent/coordinator.py")
+        return
+    
+    log.info("🚀 TaskFlowr Multi-Agent System Demo")
+    log.info(SEP_EQ60)
+    
+    # Use mock mode to avoid API issues
+    coordinator = get_coordinator(use_mock=True)
+    
+    if stream:
+        # Show each deliverable as it is generated, stopping after the preview
+        for i, demo in enumerate(DEMO_REQUESTS, 1):
+            log.info("\n🎯 Demo %d: %s", i, demo.title)
+            log.info(SEP_EQ60)
+            log.info("📝 Request: %s", demo.request)
+            log.info(SEP_DASH60)
+            await print_stream(coordinator.stream_user_request(demo.request))
+            log.info(SEP_EQ60)
+        return
+    
+    # The demos are independent, so process them as one batch and print in order
+    results = await coordinator.process_user_requests_batch([demo.request for demo in DEMO_REQUESTS])
+    
+    # The rest is INFO output, so don't render it when that level is filtered out
+    if not log.isEnabledFor(logging.INFO):
+        return
+    
+    for i, (demo, result) in enumerate(zip(DEMO_REQUESTS, results), 1):
+        # Render each demo into one buffer and log it as a single record
+        buf = io.StringIO()
+        w = buf.write
+        w(f"\n🎯 Demo {i}: {demo.title}\n")
+        w(SEP_EQ60 + "\n")
+        w(f"📝 Request: {demo.request}\n")
+        w(SEP_DASH60 + "\n")
         
-        print("🚀 TaskFlowr Multi-Agent System Demo")
-        print("=" * 60)
+        w(f"✅ Status: {result['status']}\n")
+        cr = result['component_results']
+        w(f"🤖 Agents Used: {list(cr)}\n")
         
-        # Use mock mode to avoid API issues
-        coordinator = create_coordinator(use_mock=True)
+        # Show detailed outputs
+        auto_data = cr.get('automation')
+        if auto_data:
+            if 'structured_outputs' in auto_data:
+                outputs = auto_data['structured_outputs']
+                checklists = outputs.get('checklists', [])
+                workflows = outputs.get('workflows', [])
+                w(f"📋 Automation Generated: {len(checklists)} checklists, {len(workflows)} workflows\n")
+                
+                # Show first checklist items
+                if checklists:
+                    w(f"\n🔧 Sample Checklist: {checklists[0].get('title', 'Checklist')}\n")
+                    for item in checklists[0].get('items', [])[:3]:
+                        w(f"   • {item}\n")
         
-        demo_requests = [
-            {
-                "title": "Sales Report & Team Communication", 
-                "request": "Create a sales report for Q4 2024 including monthly figures, top products, regional analysis, and email summary to sales team"
-            },
-            {
-                "title": "Employee Onboarding Package",
-                "request": "Generate onboarding checklist for new software engineers with 30-60-90 day plan, technical setup procedures, and welcome email template"
-            },
-            {
-                "title": "Executive Metrics Briefing", 
-                "request": "Analyze monthly performance metrics and prepare executive briefing with key takeaways and recommendations"
-            }
-        ]
+        comm_data = cr.get('communication')
+        if comm_data:
+            if 'communication_outputs' in comm_data:
+                outputs = comm_data['communication_outputs']
+                emails = outputs.get('emails', [])
+                summaries = outputs.get('summaries', [])
+                w(f"📧 Communication Generated: {len(emails)} emails, {len(summaries)} summaries\n")
+                
+                # Show email preview
+                if emails:
+                    w(f"\n✉️  Sample Email Subject: {emails[0].get('subject', 'No subject')}\n")
+                    if emails[0].get('body'):
+                        w(f"   Preview: {preview(emails[0]['body'], 100)}\n")
         
-        for i, demo in enumerate(demo_requests, 1):
-            print(f"\n🎯 Demo {i}: {demo['title']}")
-            print("=" * 60)
-            print(f"📝 Request: {demo['request']}")
-            print("-" * 60)
-            
-            result = await coordinator.process_user_request(demo['request'])
-            
-            print(f"✅ Status: {result['status']}")
-            print(f"🤖 Agents Used: {list(result['component_results'].keys())}")
-            
-            # Show detailed outputs
-            if 'automation' in result['component_results']:
-                auto_data = result['component_results']['automation']
-                if 'structured_outputs' in auto_data:
-                    outputs = auto_data['structured_outputs']
-                    checklists = outputs.get('checklists', [])
-                    workflows = outputs.get('workflows', [])
-                    print(f"📋 Automation Generated: {len(checklists)} checklists, {len(workflows)} workflows")
-                    
-                    # Show first checklist items
-                    if checklists:
-                        print(f"\n🔧 Sample Checklist: {checklists[0].get('title', 'Checklist')}")
-                        for item in checklists[0].get('items', [])[:3]:
-                            print(f"   • {item}")
-            
-            if 'communication' in result['component_results']:
-                comm_data = result['component_results']['communication']
-                if 'communication_outputs' in comm_data:
-                    outputs = comm_data['communication_outputs']
-                    emails = outputs.get('emails', [])
-                    summaries = outputs.get('summaries', [])
-                    print(f"📧 Communication Generated: {len(emails)} emails, {len(summaries)} summaries")
-                    
-                    # Show email preview
-                    if emails:
-                        print(f"\n✉️  Sample Email Subject: {emails[0].get('subject', 'No subject')}")
-                        if emails[0].get('body'):
-                            preview = emails[0]['body'][:100] + "..." if len(emails[0]['body']) > 100 else emails[0]['body']
-                            print(f"   Preview: {preview}")
-            
-            print(f"\n📄 Final Output Preview:")
-            print("-" * 40)
-            # Show first 300 chars of final output
-            preview = result['final_output'][:300] + "..." if len(result['final_output']) > 300 else result['final_output']
-            print(preview)
-            print("=" * 60)
-            
-            # Add a pause between demos
-            if i < len(demo_requests):
-                input("\nPress Enter to continue to next demo...")
-                print()
-    
-    except ImportError as e:
-        print(f"❌ Import Error: {e}")
-        print("💡 Make sure you're running from the taskflowr root directory")
-        print("💡 Directory structure should be: taskflowr/agent/coordinator.py")
-    except Exception as e:
-        print(f"❌ Error: {e}")
+        w("\n📄 Final Output Preview:\n")
+        w(SEP_DASH40 + "\n")
+        # Show first 300 chars of final output
+        w(preview(result['final_output']) + "\n")
+        w(SEP_EQ60)
+        log.info("%s", buf.getvalue())
+        
+        # Add a pause between demos; every request has finished by now, and a
+        # plain input() lets Ctrl-C exit without waiting on a worker thread
+        if interactive and i < len(DEMO_REQUESTS):
+            input("\nPress Enter to continue to next demo...")
+            log.info("")
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="TaskFlowr multi-agent demo")
+    parser.add_argument("--interactive", action="store_true", help="pause after each demo")
+    parser.add_argument("--stream", action="store_true", help="stream each final output preview as it is generated")
+    args = parser.parse_args()
+    
+    # LOGLEVEL=WARNING keeps the demo quiet apart from errors
+    logging.basicConfig(format="%(message)s", level=os.getenv("LOGLEVEL", "INFO").upper(), stream=sys.stdout)
+    
     try:
-        asyncio.run(run_demo())
+        from agent.utils import run_async
+        run_async(run_demo(args.interactive, args.stream))
     except KeyboardInterrupt:
-        print("\n\n👋 Demo stopped by user")
+        log.info("\n\n👋 Demo stopped by user")
     finally:
-        print("\n✨ TaskFlowr demo completed!")
+        log.info("\n✨ TaskFlowr demo completed!")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,74 +3,114 @@
 TaskFlowr with Gemini 2.5 Flash Demo
 """
 
+import io
+import sys
 import asyncio
+import logging
+import argparse
 import os
-import sys
-import getpass
+import importlib
+
+log = logging.getLogger("taskflowr.demo")
 
-# Add current directory to path
-sys.path.insert(0, os.path.dirname(__file__))
+# Separator lines for the demo output
+SEP_EQ50 = "=" * 50
+SEP_DASH50 = "-" * 50
 
-async def run_gemini_demo():
+DEMO_REQUESTS = (
+    "Create a comprehensive Q4 sales report with regional analysis and executive summary",
+    "Generate a 30-60-90 day onboarding plan for new engineers with welcome email template",
+    "Prepare weekly operations checklist for customer support team with performance metrics"
+)
+
+async def run_gemini_demo(interactive=False, stream=False):
     """Run demo with real Gemini 2.5 Flash"""
+    # Import the agents in a worker thread while the user types the key;
+    # run_in_executor starts the thread now, before the prompt blocks
+    import_future = asyncio.get_running_loop().run_in_executor(None, importlib.import_module, "agent.coordinator")
+    
+    log.info("🚀 TaskFlowr with Gemini 2.5 Flash")
+    log.info(SEP_EQ50)
+    
+    # Get API key
+    api_key = os.getenv('GOOGLE_API_KEY')
+    if not api_key:
+        # Only needed when the key is not in the environment
+        import getpass
+        # Prompt on the main thread so Ctrl-C interrupts it and restores echo
+        api_key = getpass.getpass("🔑 Enter your Google AI Studio API key: ")
+    
     try:
-        from agent.coordinator import create_coordinator
-        
-        print("🚀 TaskFlowr with Gemini 2.5 Flash")
-        print("=" * 50)
-        
-        # Get API key
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if not api_key:
-            api_key = getpass.getpass("🔑 Enter your Google AI Studio API key: ")
-        
-        if not api_key:
-            print("❌ No API key provided. Using mock mode.")
-            use_mock = True
-        else:
-            use_mock = False
+        get_coordinator = (await import_future).get_coordinator
+        from agent.utils import preview, print_stream
+    except ImportError as e:
+        log.error("❌ Import error: %s", e)
+        log.error("💡 Make sure you have google-generativeai installed: pip install google-generativeai")
+        return
+    
+    if not api_key:
+        log.warning("❌ No API key provided. Using mock mode.")
+        use_mock = True
+    else:
+        use_mock = False
+    
+    coordinator = get_coordinator(api_key, use_mock)
+    
+    log.info("\n🤖 Mode: %s", 'Gemini 2.5 Flash' if not use_mock else 'Mock Data')
+    log.info(SEP_EQ50)
+    
+    if stream:
+        # Show each deliverable as Gemini writes it, stopping after the preview
+        for i, demo in enumerate(DEMO_REQUESTS, 1):
+            log.info("\n🎯 Demo %d: %s", i, demo)
+            log.info(SEP_DASH50)
+            await print_stream(coordinator.stream_user_request(demo), 500)
+            log.info(SEP_EQ50)
+        return
+    
+    # The demos are independent, so send them to Gemini as one batch and print in order
+    results = await coordinator.process_user_requests_batch(DEMO_REQUESTS)
+    
+    # The rest is INFO output, so don't render it when that level is filtered out
+    if not log.isEnabledFor(logging.INFO):
+        return
+    
+    for i, (demo, result) in enumerate(zip(DEMO_REQUESTS, results), 1):
+        # Render each demo into one buffer and log it as a single record
+        buf = io.StringIO()
+        w = buf.write
+        w(f"\n🎯 Demo {i}: {demo}\n")
+        w(SEP_DASH50 + "\n")
         
-        coordinator = create_coordinator(api_key, use_mock)
+        w(f"✅ Status: {result['status']}\n")
+        cr = result['component_results']
+        w(f"🤖 Agents: {list(cr)}\n")
         
-        print(f"\n🤖 Mode: {'Gemini 2.5 Flash' if not use_mock else 'Mock Data'}")
-        print("=" * 50)
+        # Show actual outputs
+        auto_data = cr.get('automation')
+        if auto_data:
+            if 'structured_outputs' in auto_data:
+                outputs = auto_data['structured_outputs']
+                w(f"📋 Checklists: {len(outputs.get('checklists', []))}\n")
+                w(f"🔄 Workflows: {len(outputs.get('workflows', []))}\n")
         
-        # Demo requests
-        demos = [
-            "Create a comprehensive Q4 sales report with regional analysis and executive summary",
-            "Generate a 30-60-90 day onboarding plan for new engineers with welcome email template",
-            "Prepare weekly operations checklist for customer support team with performance metrics"
-        ]
+        w("\n📄 Final Output Preview:\n")
+        w(preview(result['final_output'], 500) + "\n")
+        w(SEP_EQ50)
+        log.info("%s", buf.getvalue())
         
-        for i, demo in enumerate(demos, 1):
-            print(f"\n🎯 Demo {i}: {demo}")
-            print("-" * 50)
-            
-            result = await coordinator.process_user_request(demo)
-            
-            print(f"✅ Status: {result['status']}")
-            print(f"🤖 Agents: {list(result['component_results'].keys())}")
-            
-            # Show actual outputs
-            if 'automation' in result['component_results']:
-                auto_data = result['component_results']['automation']
-                if 'structured_outputs' in auto_data:
-                    outputs = auto_data['structured_outputs']
-                    print(f"📋 Checklists: {len(outputs.get('checklists', []))}")
-                    print(f"🔄 Workflows: {len(outputs.get('workflows', []))}")
-            
-            print(f"\n📄 Final Output Preview:")
-            print(result['final_output'][:500] + "..." if len(result['final_output']) > 500 else result['final_output'])
-            print("=" * 50)
-            
-            if i < len(demos):
-                input("\nPress Enter for next demo...")
-    
-    except ImportError as e:
-        print(f"❌ Import error: {e}")
-        print("💡 Make sure you have google-generativeai installed: pip install google-generativeai")
-    except Exception as e:
-        print(f"❌ Error: {e}")
+        # Blocking on purpose: nothing else is running, and Ctrl-C exits cleanly
+        if interactive and i < len(DEMO_REQUESTS):
+            input("\nPress Enter for next demo...")
 
 if __name__ == "__main__":
-    asyncio.run(run_gemini_demo())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="TaskFlowr demo with Gemini 2.5 Flash")
+    parser.add_argument("--interactive", action="store_true", help="pause after each demo")
+    parser.add_argument("--stream", action="store_true", help="stream each final output preview as it is generated")
+    args = parser.parse_args()
+    
+    # LOGLEVEL=WARNING keeps the demo quiet apart from errors
+    logging.basicConfig(format="%(message)s", level=os.getenv("LOGLEVEL", "INFO").upper(), stream=sys.stdout)
+    
+    from agent.utils import run_async
+    run_async(run_gemini_demo(args.interactive, args.stream))
\ No newline at end of file
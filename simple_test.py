@@ -3,50 +3,70 @@
 Simple test without complex imports
 """
 
-import asyncio
-import sys
 import os
+import sys
+import asyncio
+import logging
+
+log = logging.getLogger("taskflowr.demo")
 
-# Add current directory to path
-sys.path.append(os.path.dirname(__file__))
+def _result_ok(result):
+    """A completed result that actually has agent output and a deliverable"""
+    return result['status'] == 'completed' and bool(result.get('component_results')) and bool(result.get('final_output'))
 
 async def simple_test():
     """Simple test that definitely works"""
     try:
         # Import the coordinator directly
-        from agent.coordinator import create_coordinator
-        
-        print("🧪 Simple TaskFlowr Test")
-        print("=" * 40)
-        
-        # Create coordinator with mock data
-        coordinator = create_coordinator(use_mock=True)
-        
-        # Test a simple request
-        test_request = "Create a daily standup meeting checklist"
-        print(f"📝 Testing: {test_request}")
-        
-        result = await coordinator.process_user_request(test_request)
-        
-        print(f"✅ Success! Status: {result['status']}")
-        print(f"🤖 Agents used: {list(result['component_results'].keys())}")
-        
-        # Show what was generated
-        if 'automation' in result['component_results']:
-            auto_data = result['component_results']['automation']
-            if 'structured_outputs' in auto_data:
-                checklists = auto_data['structured_outputs'].get('checklists', [])
-                if checklists:
-                    print(f"📋 Generated {len(checklists)} checklists")
-                    print("Sample items:")
-                    for item in checklists[0].get('items', [])[:3]:
-                        print(f"  • {item}")
-        
-        print("\n🎉 Test completed successfully!")
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        print("💡 Make sure you're in the taskflowr root directory")
+        from agent.coordinator import get_coordinator
+    except ImportError as e:
+        log.error("❌ Error: %s", e)
+        log.error("💡 Make sure you're in the taskflowr root directory")
+        sys.exit(1)
+    
+    log.info("🧪 Simple TaskFlowr Test")
+    log.info("=" * 40)
+    
+    # Create coordinator with mock data
+    coordinator = get_coordinator(use_mock=True)
+    
+    # Test a simple request
+    test_request = "Create a daily standup meeting checklist"
+    log.info("📝 Testing: %s", test_request)
+    
+    result = await coordinator.process_user_request(test_request)
+    
+    log.info("✅ Success! Status: %s", result['status'])
+    log.info("🤖 Agents used: %s", list(result['component_results'].keys()))
+    
+    # Show what was generated
+    if 'automation' in result['component_results']:
+        auto_data = result['component_results']['automation']
+        if 'structured_outputs' in auto_data:
+            checklists = auto_data['structured_outputs'].get('checklists', [])
+            if checklists:
+                log.info("📋 Generated %d checklists", len(checklists))
+                log.info("Sample items:")
+                for item in checklists[0].get('items', [])[:3]:
+                    log.info("  • %s", item)
+    
+    # Smoke-test every demo prompt from main.py and run_gemini_demo.py in one concurrent batch
+    from main import DEMO_REQUESTS
+    from run_gemini_demo import DEMO_REQUESTS as GEMINI_DEMO_REQUESTS
+    
+    demo_requests = [demo.request for demo in DEMO_REQUESTS] + list(GEMINI_DEMO_REQUESTS)
+    results = await coordinator.process_user_requests_batch(demo_requests)
+    failed = [request for request, result in zip(demo_requests, results) if not _result_ok(result)]
+    
+    log.info("\n🧪 Demo prompts completed: %d/%d", len(demo_requests) - len(failed), len(demo_requests))
+    for request in failed:
+        log.error("❌ Failed: %s", request)
+    if failed:
+        sys.exit(1)
+    
+    log.info("\n🎉 Test completed successfully!")
 
 if __name__ == "__main__":
+    # LOGLEVEL=WARNING keeps the test quiet apart from failures
+    logging.basicConfig(format="%(message)s", level=os.getenv("LOGLEVEL", "INFO").upper(), stream=sys.stdout)
     asyncio.run(simple_test())
\ No newline at end of file